@@ -0,0 +1,64 @@
+"""Benchmark of key skills counting: `Analyzer.find_top_words_from_keys`.
+
+Run from the `backend` directory:
+
+    python -m benchmarks.bench_keywords [--sizes 1000 10000 100000] [--legacy]
+
+Time per vacancy should stay flat while the corpus grows (linear scaling).
+`--legacy` also runs the previous `list.count` implementation (quadratic, slow on 100k).
+"""
+import argparse
+import random
+import re
+import time
+from typing import List
+
+from src.analyzer import Analyzer
+
+
+def make_keys(num_vacancies: int, vocabulary: int = 5000, seed: int = 255) -> List[List[str]]:
+    rnd = random.Random(seed)
+    skills = [f"Skill'{i}" for i in range(vocabulary)]
+    # Skills frequencies in real data are close to Zipf distribution
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    return [rnd.choices(skills, weights, k=rnd.randint(0, 12)) for _ in range(num_vacancies)]
+
+
+def legacy_find_top_words_from_keys(keys_list: List) -> dict:
+    lst_keys = []
+    for keys_elem in keys_list:
+        for el in keys_elem:
+            if el != "":
+                lst_keys.append(re.sub("'", "", el.lower()))
+
+    set_keys = set(lst_keys)
+    dct_keys = {el: lst_keys.count(el) for el in set_keys}
+    return dict(sorted(dct_keys.items(), key=lambda x: x[1], reverse=True))
+
+
+def timeit(func, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Key skills counting benchmark")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy", action="store_true", help="Run the quadratic implementation too")
+    args = parser.parse_args()
+
+    print(f"{'vacancies':>10} {'time, s':>10} {'us/vacancy':>11} {'legacy, s':>10}")
+    for size in args.sizes:
+        keys = make_keys(size)
+        elapsed = timeit(Analyzer.find_top_words_from_keys, keys)
+        legacy = timeit(legacy_find_top_words_from_keys, keys, repeat=1) if args.legacy else None
+        legacy_txt = f"{legacy:10.3f}" if legacy is not None else f"{'-':>10}"
+        print(f"{size:>10} {elapsed:10.4f} {elapsed / size * 1e6:11.2f} {legacy_txt}")
+
+
+if __name__ == "__main__":
+    main()
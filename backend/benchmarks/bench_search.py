@@ -0,0 +1,261 @@
+"""End-to-end benchmark of `/api/search` and `DataCollector.collect_vacancies` against a local hh.ru stub.
+
+Run from the `backend` directory:
+
+    python -m benchmarks.bench_search [--modes server collector] [--corpus 5000] [--latency 0.05]
+        [--jitter 0.01] [--error-rate 0.01] [--requests 20] [--concurrency 4] [--vacancies 100]
+        [--json results.json]
+
+The stub (`benchmarks/hh_stub.py`) is started in a background thread, or an external one is used
+with `--stub-url`. Caches and the local vacancy index are created in a temporary directory, so every
+request crawls the stub and the real index is not touched.
+
+For every mode the benchmark prints throughput (requests and vacancies per second), p50/p95/p99
+latency of the measured calls and of the upstream HTTP requests, and peak memory (Python
+allocations traced with `tracemalloc` and the process max RSS).
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.hh_stub import StubConfig, StubServer
+
+RATES = {"RUR": 1, "USD": 0.0126, "EUR": 0.0108}
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+class HttpRecorder:
+    """Record the duration of every upstream request made through `HttpClient.get`."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def install(self):
+        from src.http_client import HttpClient
+
+        original = HttpClient.get
+        recorder = self
+
+        def get(client, url, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(client, url, **kwargs)
+            except Exception:
+                with recorder._lock:
+                    recorder.failures += 1
+                raise
+            finally:
+                with recorder._lock:
+                    recorder.latencies.append(time.perf_counter() - start)
+
+        HttpClient.get = get
+
+    def reset(self):
+        with self._lock:
+            self.latencies, self.failures = [], 0
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {**percentiles(self.latencies), "requests": len(self.latencies), "failures": self.failures}
+
+
+@contextlib.contextmanager
+def measure_memory(enabled: bool, result: Dict):
+    if enabled:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if enabled:
+            result["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result["max_rss_mb"] = rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def bench_server(args, recorder: HttpRecorder, cached: bool = False) -> Dict:
+    import server
+
+    queries = [f"benchmark query {i}" for i in range(args.requests)]
+
+    def search(query):
+        start = time.perf_counter()
+        response = server.app.test_client().get(
+            "/api/search", query_string={"query": query, "num_vacancies": args.vacancies}
+        )
+        elapsed = time.perf_counter() - start
+        ok = response.status_code == 200
+        return elapsed, ok, len(response.get_json()["vacancies"]) if ok else 0
+
+    if cached:
+        # Results of the first pass are in the cache now
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(search, queries))
+    recorder.reset()
+    result = {"mode": "server-cached" if cached else "server"}
+    with measure_memory(args.tracemalloc, result):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            calls = list(pool.map(search, queries))
+        wall = time.perf_counter() - start
+
+    result.update(
+        requests=len(calls),
+        errors=sum(not ok for _, ok, _ in calls),
+        vacancies=sum(count for _, _, count in calls),
+        wall=wall,
+        latency=percentiles([elapsed for elapsed, _, _ in calls]),
+        http=recorder.summary(),
+    )
+    return result
+
+
+def bench_collector(args, recorder: HttpRecorder, workdir: str) -> Dict:
+    import src.data_collector as data_collector
+    from src.fetcher import RateLimiter
+
+    data_collector.CACHE_DIR = os.path.join(workdir, "collector")
+    collector = data_collector.DataCollector(RATES, limiter=RateLimiter(args.rate_limit))
+
+    recorder.reset()
+    result = {"mode": "collector"}
+    runs = []
+    with measure_memory(args.tracemalloc, result):
+        start = time.perf_counter()
+        for i in range(args.requests):
+            run_start = time.perf_counter()
+            # Progress bars and debug output of the collector are not a part of the report
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                table = collector.collect_vacancies(
+                    {"text": f"collector query {i}", "per_page": 100},
+                    refresh=True,
+                    num_workers=args.concurrency * 2,
+                    limit=args.vacancies,
+                )
+            runs.append((time.perf_counter() - run_start, len(table) if table else 0))
+        wall = time.perf_counter() - start
+
+    result.update(
+        requests=len(runs),
+        errors=sum(not count for _, count in runs),
+        vacancies=sum(count for _, count in runs),
+        wall=wall,
+        latency=percentiles([elapsed for elapsed, _ in runs]),
+        http=recorder.summary(),
+    )
+    return result
+
+
+def print_report(results: List[Dict]):
+    header = (
+        f"{'mode':<14} {'calls':>6} {'errors':>6} {'wall, s':>8} {'calls/s':>8} {'vac/s':>8} "
+        f"{'p50, ms':>8} {'p95, ms':>8} {'p99, ms':>8} {'http p50':>9} {'http p99':>9} {'http err':>8} "
+        f"{'peak, MB':>9} {'rss, MB':>8}"
+    )
+    print(header)
+    for res in results:
+        latency, http = res["latency"], res["http"]
+        peak = f"{res['peak_traced_mb']:9.1f}" if "peak_traced_mb" in res else f"{'-':>9}"
+        print(
+            f"{res['mode']:<14} {res['requests']:>6} {res['errors']:>6} {res['wall']:8.2f} "
+            f"{res['requests'] / res['wall']:8.2f} {res['vacancies'] / res['wall']:8.1f} "
+            f"{latency['p50'] * 1e3:8.1f} {latency['p95'] * 1e3:8.1f} {latency['p99'] * 1e3:8.1f} "
+            f"{http['p50'] * 1e3:9.1f} {http['p99'] * 1e3:9.1f} {http['failures']:>8} "
+            f"{peak} {res['max_rss_mb']:8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end search benchmark against a local hh.ru stub")
+    parser.add_argument("--modes", nargs="*", default=["server", "collector"], choices=["server", "collector"])
+    parser.add_argument("--stub-url", default=None, help="Use an already running stub instead of a local one")
+    parser.add_argument("--corpus", type=int, default=5000, help="Stub corpus size")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub response delay, seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Stub delay jitter, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of HTTP 503 responses of the stub")
+    parser.add_argument("--requests", type=int, default=20, help="Number of searches (collector runs)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel searches (collector: workers / 2)")
+    parser.add_argument("--vacancies", type=int, default=100, help="Vacancies per search")
+    parser.add_argument("--rate-limit", type=float, default=1000, help="Requests per second to the stub")
+    parser.add_argument(
+        "--no-tracemalloc",
+        dest="tracemalloc",
+        action="store_false",
+        help="Do not trace allocations (tracemalloc slows Python code down)",
+    )
+    parser.add_argument("--json", default=None, help="Save results to a JSON file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hh_bench_")
+    stub = None
+    if args.stub_url is None:
+        stub = StubServer(StubConfig(args.corpus, args.latency, args.jitter, args.error_rate)).start()
+    # Settings are read on import of the server and the collector, so they are set before it
+    os.environ["HH_API_URL"] = args.stub_url or stub.url
+    os.environ["HH_RATE_LIMIT"] = str(args.rate_limit)
+    # Caches, the local vacancy index, locks, jobs and metrics are created in the work dir, not in the real cache
+    os.environ["CACHE_DIR"] = workdir
+    os.environ["VACANCY_CACHE_DIR"] = os.path.join(workdir, "vacancies")
+    os.environ["VACANCY_INDEX_PATH"] = os.path.join(workdir, "vacancies.db")
+    os.environ.setdefault("PREDICT_SALARIES", "0")
+
+    try:
+        logging.disable(logging.WARNING)
+        recorder = HttpRecorder()
+        recorder.install()
+
+        results = []
+        print(
+            f"hh.ru stub: {os.environ['HH_API_URL']}, corpus {args.corpus}, latency {args.latency}s, "
+            f"error rate {args.error_rate}; work dir {workdir}\n"
+        )
+        for mode in args.modes:
+            if mode == "server":
+                runs = [bench_server(args, recorder), bench_server(args, recorder, cached=True)]
+            else:
+                # Vacancy details are cached in memory and on disk: clean both so the collector crawls the stub too
+                from src.cache import get_vacancy_cache
+
+                get_vacancy_cache().clear()
+                shutil.rmtree(os.environ["VACANCY_CACHE_DIR"], ignore_errors=True)
+                os.makedirs(os.environ["VACANCY_CACHE_DIR"])
+                runs = [bench_collector(args, recorder, workdir)]
+            results.extend(runs)
+
+        print_report(results)
+        if stub is not None:
+            print(f"\nStub: {stub.config.requests} requests, {stub.config.errors} injected errors")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"args": vars(args), "results": results}, f, indent=2)
+    finally:
+        if stub is not None:
+            stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
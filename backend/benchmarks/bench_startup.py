@@ -0,0 +1,107 @@
+"""Benchmark of the CLI cold start: imports and time to the first hh.ru request.
+
+Run from the `backend` directory:
+
+    python -m benchmarks.bench_startup [--module researcher] [--top 15] [--repeat 3]
+
+Every measurement runs in a fresh interpreter:
+
+* `python -X importtime -c "import <module>"` - slowest modules by cumulative import time;
+* `ResearcherHH` is created and started with all HTTP requests intercepted, the time from the
+  interpreter start to the first `/vacancies` request and heavy modules loaded by then are printed.
+  No network access is needed.
+
+numpy is expected in the list: `src.salary` and `src.vacancy_store` import it, and `DataCollector`
+needs both before the first request (salary normalizer, cached table check). pandas, plotting,
+ML and NLP libraries are loaded only when they are used, after the collection.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("numpy", "pandas", "matplotlib", "seaborn", "scipy", "sklearn", "nltk")
+
+FIRST_REQUEST_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+
+import requests
+from src.http_client import HttpClient
+
+def get(self, url, **kwargs):
+    if "/vacancies" in url:
+        heavy = [name for name in {heavy} if name in sys.modules]
+        print(json.dumps({{"first_request": time.perf_counter() - start, "heavy_modules": heavy}}))
+        sys.stdout.flush()
+        os._exit(0)
+    raise requests.exceptions.ConnectionError("network is disabled in the benchmark")
+
+HttpClient.get = get
+
+from researcher import ResearcherHH
+
+researcher = ResearcherHH(no_parse=True)
+researcher.update(refresh=True, incremental=False, queries=[])
+researcher()
+"""
+
+
+def import_times(module: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """Total import time of `module` and cumulative time of every imported module (seconds)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times.append((int(cumulative) / 1e6, name.strip()))
+    total = next(cumulative for cumulative, name in reversed(times) if name == module)
+    return total, times
+
+
+def first_request_time() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST_SCRIPT.format(heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"First request was not reached:\n{result.stdout}\n{result.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI cold start benchmark")
+    parser.add_argument("--module", default="researcher", help="Module to import (e.g. researcher, server)")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to show")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    totals = [import_times(args.module) for _ in range(args.repeat)]
+    total, times = min(totals, key=lambda item: item[0])
+    print(f"import {args.module}: {total:.3f} s (best of {args.repeat})")
+    print(f"{'cumulative, s':>14}  module")
+    for cumulative, name in sorted(times, reverse=True)[: args.top]:
+        print(f"{cumulative:14.3f}  {name}")
+
+    if args.module == "researcher":
+        runs = [first_request_time() for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["first_request"])
+        print(f"\nFirst /vacancies request after {best['first_request']:.3f} s (best of {args.repeat})")
+        print(f"Heavy modules loaded by then: {', '.join(best['heavy_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
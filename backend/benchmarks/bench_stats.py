@@ -0,0 +1,109 @@
+"""Micro-benchmarks of statistics and word counting on synthetic vacancies.
+
+Run from the `backend` directory:
+
+    python -m benchmarks.bench_stats [--sizes 1000 10000 100000] [--repeat 3] [--workers 1 2 4]
+
+Vacancies are generated like the ones of the hh.ru stub (`benchmarks/hh_stub.py`), salaries are
+normalized and descriptions are cleaned as in `DataCollector`. Measured functions:
+
+* `VacancyStatistics.update` + `summary` - `/api/search` statistics;
+* `SalaryStats.median` - exact quantile over the salary histogram;
+* `Analyzer.find_top_words_from_keys` - key skills counting;
+* `Analyzer.find_top_words_from_description` - description words counting;
+* `SalaryNormalizer.normalize_records` - salary conversion to net RUR;
+* `Analyzer.aggregate` - skills, words and salaries of `Analyzer.analyze_df` with every number of
+  `--workers` processes (corpora smaller than `Analyzer.PARALLEL_MIN_VACANCIES` are not sharded).
+"""
+import argparse
+import copy
+import time
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from benchmarks.hh_stub import make_vacancy
+from src.analyzer import Analyzer
+from src.salary import SalaryNormalizer
+from src.statistics import SalaryStats, VacancyStatistics
+from src.text import html_to_text
+
+RATES = {"RUR": 1, "USD": 0.0126, "EUR": 0.0108}
+
+
+def make_records(num_vacancies: int) -> List[Dict]:
+    """Raw vacancy dicts in the format of `DataCollector.get_vacancy` (salary is not normalized)."""
+    records = []
+    for i in range(num_vacancies):
+        vacancy = make_vacancy(i)
+        salary = vacancy["salary"] or {}
+        records.append(
+            {
+                "id": vacancy["id"],
+                "name": vacancy["name"],
+                "employer": vacancy["employer"]["name"],
+                "salary_from": salary.get("from"),
+                "salary_to": salary.get("to"),
+                "salary_currency": salary.get("currency"),
+                "salary_gross": salary.get("gross"),
+                "experience": vacancy["experience"]["name"],
+                "key_skills": [skill["name"] for skill in vacancy["key_skills"]],
+                "description": html_to_text(vacancy["description"]),
+            }
+        )
+    return records
+
+
+def timeit(func: Callable, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def salary_stats(records: List[Dict]) -> SalaryStats:
+    stats = SalaryStats()
+    for record in records:
+        for key in ("salary_from", "salary_to"):
+            if record.get(key):
+                stats.add(record[key])
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistics and word count micro-benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4], help="Analyzer process counts")
+    args = parser.parse_args()
+
+    normalizer = SalaryNormalizer(RATES)
+    print(f"{'benchmark':<24} {'vacancies':>10} {'time, s':>10} {'us/vacancy':>11}")
+    for size in args.sizes:
+        raw = make_records(size)
+        records = normalizer.normalize_records(copy.deepcopy(raw))
+        salaries = salary_stats(records)
+        keys = [record["key_skills"] for record in records]
+        descriptions = [record["description"] for record in records]
+        df = pd.DataFrame(records)
+        # Records are copied outside of the measured function: normalization works in place
+        copies = [copy.deepcopy(raw) for _ in range(args.repeat)]
+
+        benchmarks = {
+            "vacancy_statistics": lambda: VacancyStatistics().update(records).summary(),
+            "salary_median": lambda: salaries.median,
+            "top_words_from_keys": lambda: Analyzer.find_top_words_from_keys(keys),
+            "top_words_from_desc": lambda: Analyzer.find_top_words_from_description(descriptions),
+            "normalize_salaries": lambda: normalizer.normalize_records(copies.pop()),
+        }
+        for workers in args.workers:
+            benchmarks[f"analyzer_aggregate_w{workers}"] = lambda w=workers: Analyzer(num_workers=w).aggregate(df)
+        for name, func in benchmarks.items():
+            elapsed = timeit(func, args.repeat)
+            print(f"{name:<24} {size:>10} {elapsed:10.4f} {elapsed / size * 1e6:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
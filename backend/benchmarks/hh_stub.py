@@ -0,0 +1,215 @@
+"""Local stand-in for `api.hh.ru/vacancies` with configurable latency, error rate and corpus size.
+
+Run from the `backend` directory:
+
+    python -m benchmarks.hh_stub [--port 8800] [--corpus 5000] [--latency 0.05] [--jitter 0.02] [--error-rate 0.01]
+
+and point the server or the CLI to it:
+
+    HH_API_URL=http://127.0.0.1:8800 gunicorn server:app
+
+Endpoints:
+
+* `GET /vacancies?text=...&page=...&per_page=...` - listing. Every query text gets its own
+  (deterministic) window of the corpus, so different queries share some vacancies like real ones;
+* `GET /vacancies/<id>` - vacancy details with salary, key skills and an HTML description.
+
+Responses are delayed by `latency` +- `jitter` seconds, `error_rate` of them are HTTP 503.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+SKILLS = (
+    "Python, SQL, Git, Docker, Linux, PostgreSQL, Django, Flask, Kubernetes, Java, Spring, JavaScript, TypeScript, "
+    "React, Vue.js, Node.js, C++, Go, Kafka, Redis, Pandas, NumPy, Machine Learning, PyTorch, Airflow, Spark, "
+    "ClickHouse, REST, CI/CD, Английский язык"
+).split(", ")
+WORDS = (
+    "develop design support backend frontend services team product experience code review testing deploy cloud data "
+    "pipeline analytics performance api microservices разработка команда опыт проект задачи сервис поддержка знание "
+    "работа условия"
+).split()
+EXPERIENCE = [
+    ("noExperience", "Нет опыта"),
+    ("between1And3", "От 1 года до 3 лет"),
+    ("between3And6", "От 3 до 6 лет"),
+    ("moreThan6", "Более 6 лет"),
+]
+CURRENCIES = ["RUR"] * 8 + ["USD", "EUR"]
+MAX_DEPTH = 2000
+
+
+def make_vacancy(vacancy_id: int, seed: int = 255) -> Dict:
+    """Deterministic vacancy details in the format of `GET /vacancies/<id>`."""
+    rnd = random.Random(vacancy_id * 7919 + seed)
+    experience_id, experience_name = rnd.choice(EXPERIENCE)
+    salary = None
+    if rnd.random() < 0.6:
+        base = rnd.randrange(50, 400) * 1000
+        currency = rnd.choice(CURRENCIES)
+        if currency != "RUR":
+            base //= 80
+        salary = {
+            "from": base if rnd.random() < 0.8 else None,
+            "to": int(base * rnd.uniform(1.1, 1.6)) if rnd.random() < 0.6 else None,
+            "currency": currency,
+            "gross": rnd.random() < 0.5,
+        }
+    description = "".join(
+        f"<p>{' '.join(rnd.choices(WORDS, k=rnd.randint(8, 20)))}</p>" for _ in range(rnd.randint(3, 8))
+    )
+    return {
+        "id": str(vacancy_id),
+        "name": f"{rnd.choice(['Junior', 'Middle', 'Senior', 'Lead'])} {rnd.choice(SKILLS)} developer",
+        "employer": {"name": f"Company {rnd.randrange(500)}", "alternate_url": f"https://hh.ru/employer/{vacancy_id}"},
+        "salary": salary,
+        "experience": {"id": experience_id, "name": experience_name},
+        "schedule": {"id": "fullDay", "name": "Полный день"},
+        "key_skills": [{"name": name} for name in rnd.sample(SKILLS, rnd.randint(0, 10))],
+        "description": description,
+        "published_at": "2024-01-01T10:00:00+0300",
+    }
+
+
+def listing_item(vacancy: Dict) -> Dict:
+    return {key: vacancy[key] for key in ("id", "name", "employer", "salary", "experience", "published_at")}
+
+
+class StubConfig:
+    """Stub behaviour and request counters shared by all handler threads."""
+
+    def __init__(
+        self, corpus: int = 5000, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 255
+    ):
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def next_request(self) -> bool:
+        """Count a request, return `True` if it has to fail."""
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.error_rate
+            self.errors += fail
+            return fail
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + jitter)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: StubConfig
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, data: Dict):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.config.delay())
+        if self.config.next_request():
+            self._send(503, {"errors": [{"type": "service_unavailable"}]})
+            return
+
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["vacancies"]:
+            self._send(200, self._listing(parse_qs(url.query)))
+        elif len(parts) == 2 and parts[0] == "vacancies" and parts[1].isdigit() and int(parts[1]) < self.config.corpus:
+            self._send(200, make_vacancy(int(parts[1]), self.config.seed))
+        else:
+            self._send(404, {"errors": [{"type": "not_found"}]})
+
+    def _listing(self, query: Dict) -> Dict:
+        corpus = self.config.corpus
+        per_page = min(int(query.get("per_page", ["20"])[0]), 100)
+        page = int(query.get("page", ["0"])[0])
+        offset = zlib.crc32(query.get("text", [""])[0].encode("utf-8")) % corpus
+        start, stop = page * per_page, min((page + 1) * per_page, corpus, MAX_DEPTH)
+        items = [listing_item(make_vacancy((offset + i) % corpus, self.config.seed)) for i in range(start, stop)]
+        return {"found": corpus, "pages": -(-min(corpus, MAX_DEPTH) // per_page), "page": page, "items": items}
+
+
+class StubServer:
+    """hh.ru stub in a background thread of the current process.
+
+    Usage::
+
+        with StubServer(StubConfig(corpus=1000, latency=0.02)) as stub:
+            os.environ["HH_API_URL"] = stub.url
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        handler = type("Handler", (StubHandler,), {"config": config or StubConfig()})
+        self.config = handler.config
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local hh.ru API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--corpus", type=int, default=5000, help="Number of vacancies")
+    parser.add_argument("--latency", type=float, default=0.05, help="Response delay, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +- addition to the delay, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of HTTP 503 responses")
+    parser.add_argument("--seed", type=int, default=255)
+    args = parser.parse_args()
+
+    config = StubConfig(args.corpus, args.latency, args.jitter, args.error_rate, args.seed)
+    server = StubServer(config, args.host, args.port)
+    print(f"hh.ru stub is listening on {server.url} (corpus {args.corpus}, latency {args.latency}s)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -42,16 +42,23 @@ OR CORRECTION.
 # Contacts      : <empty>
 # License       : GNU GENERAL PUBLIC LICENSE
 
+import hashlib
+import json
 import os
-from typing import Optional
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Union
 
 from src.analyzer import Analyzer
 from src.currency_exchange import Exchanger
 from src.data_collector import DataCollector
+from src.fetcher import RateLimiter
 from src.parser import Settings
 from src.predictor import Predictor
+from src.statistics import VacancyStatistics
 
 CACHE_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), "cache")
+RESULTS_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), "results")
 SETTINGS_PATH = "settings.json"
 
 
@@ -67,27 +74,129 @@ class ResearcherHH:
 
     def update(self, **kwargs):
         self.settings.update_params(**kwargs)
-        if not any(self.settings.rates.values()) or self.settings.update:
+        # Cached rates are used right away, stale ones are refreshed in background.
+        # Wait for the remote server only if there are no rates at all or rates are saved (--update).
+        no_rates = not any(self.settings.rates.values())
+        if no_rates or self.settings.update:
             print("[INFO]: Trying to get exchange rates from remote server...")
-            self.exchanger.update_exchange_rates(self.settings.rates)
+        self.exchanger.update_exchange_rates(self.settings.rates, block=no_rates, force=self.settings.update)
+        if no_rates or self.settings.update:
             self.exchanger.save_rates(self.settings.rates)
 
         print(f"[INFO]: Get exchange rates: {self.settings.rates}")
-        self.collector = DataCollector(self.settings.rates)
-        self.analyzer = Analyzer(self.settings.save_result)
+        # One collector for all queries: HTTP pool, rate limiter and vacancy cache are shared,
+        # so batch queries run in parallel do not multiply the request rate
+        limiter = RateLimiter(self.settings.rate_limit) if self.settings.rate_limit else None
+        self.collector = DataCollector(self.settings.rates, limiter=limiter)
+        self.analyzer = Analyzer(self.settings.save_result, self.settings.analysis_workers)
 
     def __call__(self):
+        if self.settings.queries:
+            self.run_batch()
+            return
+
         print("[INFO]: Collect data from JSON. Create list of vacancies...")
-        vacancies = self.collector.collect_vacancies(
-            query=self.settings.options, refresh=self.settings.refresh, num_workers=self.settings.num_workers
-        )
+        vacancies = self.collect(self.settings.options)
         print("[INFO]: Prepare dataframe...")
         df = self.analyzer.prepare_df(vacancies)
         print("\n[INFO]: Analyze dataframe...")
         self.analyzer.analyze_df(df)
-        print("\n[INFO]: Predict None salaries...")
+        if self.settings.train and vacancies:
+            print("\n[INFO]: Train salary model...")
+            self.predictor.train(vacancies)
+        if not df.empty:
+            print("\n[INFO]: Predict None salaries...")
+            self.predictor.predict(df)
         print("[INFO]: Done! Exit()")
 
+    def collect(self, query: Dict):
+        return self.collector.collect_vacancies(
+            query=query,
+            refresh=self.settings.refresh,
+            num_workers=self.settings.num_workers,
+            incremental=self.settings.incremental,
+        )
+
+    def batch_queries(self) -> List[Dict]:
+        """Queries of the batch: texts replace `options["text"]`, dicts are merged over `options`."""
+        queries = []
+        for query in self.settings.queries:
+            if isinstance(query, str):
+                query = {"text": query}
+            queries.append({**(self.settings.options or {}), **query})
+        return queries
+
+    @staticmethod
+    def query_name(query: Dict) -> str:
+        slug = re.sub(r"[^\w]+", "_", str(query.get("text", "")), flags=re.UNICODE).strip("_").lower()
+        digest = hashlib.md5(json.dumps(query, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:8]
+        return f"{slug or 'query'}_{digest}"
+
+    def run_batch(self, queries: Optional[List[Union[str, Dict]]] = None, results_dir: str = RESULTS_DIR) -> Dict:
+        """Collect and analyze several queries concurrently.
+
+        Parameters
+        ----------
+        queries : list
+            Query texts or option dicts. `settings.queries` by default.
+        results_dir : str
+            Directory for `<query>.json` statistics (and `<query>.csv` if `save_result` is set)
+            and the combined `summary.json`.
+
+        Returns
+        -------
+        dict
+            Combined summary: statistics of every query and of all unique vacancies.
+        """
+        if queries is not None:
+            self.settings.update_params(queries=queries)
+        queries = self.batch_queries()
+        os.makedirs(results_dir, exist_ok=True)
+        print(f"[INFO]: Run batch of {len(queries)} queries ({self.settings.query_workers} in parallel)...")
+
+        combined = VacancyStatistics()
+        seen_ids = set()
+        summary = {"queries": []}
+        with ThreadPoolExecutor(max_workers=max(1, self.settings.query_workers or 1)) as pool:
+            futures = {pool.submit(self.collect, query): query for query in queries}
+            # Results are processed in the main thread one by one, so the output is not interleaved
+            for future in as_completed(futures):
+                query = futures[future]
+                name = self.query_name(query)
+                try:
+                    vacancies = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Query {query} failed: {str(e)}")
+                    summary["queries"].append({"query": query, "name": name, "error": str(e)})
+                    continue
+
+                stats = VacancyStatistics()
+                for record in vacancies.to_records() if vacancies else []:
+                    stats.add(record)
+                    if record["id"] not in seen_ids:
+                        seen_ids.add(record["id"])
+                        combined.add(record)
+
+                result = {"query": query, "name": name, "statistics": stats.summary()}
+                with open(os.path.join(results_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                    json.dump(result, f, ensure_ascii=False, indent=2)
+                if self.settings.save_result and vacancies:
+                    vacancies.to_dataframe().to_csv(os.path.join(results_dir, f"{name}.csv"), index=False)
+                summary["queries"].append(result)
+                print(
+                    f"[INFO]: Query {query.get('text', '')!r}: {stats.count} vacancies, "
+                    f"salary {stats.salary.summary()}"
+                )
+
+        # Keep the order of the settings in the summary
+        order = {self.query_name(query): i for i, query in enumerate(queries)}
+        summary["queries"].sort(key=lambda item: order.get(item.get("name"), len(order)))
+        summary["combined"] = combined.summary()
+        with open(os.path.join(results_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"[INFO]: Batch done: {combined.count} unique vacancies. Summary: {results_dir}")
+        return summary
+
 
 if __name__ == "__main__":
     hh_analyzer = ResearcherHH()
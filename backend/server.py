@@ -1,13 +1,31 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, g, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 import requests
 import os
 import json
+import re
+import sqlite3
+import time
 from datetime import datetime, timedelta
 import logging
-import time
+from urllib.parse import urlsplit
+from werkzeug.exceptions import NotFound
+
+from src.cache import CACHE_DIR, EncodedResponse, ResponseCache, get_vacancy_cache, normalize_key
+from src.currency_exchange import Exchanger
+from src.fetcher import ConcurrentFetcher, RateLimiter
+from src.http_client import HH_API_URL, get_client
+from src.jobs import Job, JobManager, JobQueueFull
+from src.metrics import MetricsRegistry
+from src.paginator import VacancyPaginator
+from src.salary import SalaryNormalizer
+from src.salary_model import MODEL_DIR, LatestSalaryModel
+from src.singleflight import SingleFlight
+from src.statistics import VacancyStatistics
+from src.text import html_to_text
+from src.vacancy_index import get_vacancy_index
 
-app = Flask(__name__, static_folder='frontend/build')
+app = Flask(__name__, static_folder="frontend/build")
 
 # Настройка CORS
 CORS(app, supports_credentials=True)
@@ -15,216 +33,568 @@ CORS(app, supports_credentials=True)
 # Добавляем CORS заголовки для всех ответов
 @app.after_request
 def after_request(response):
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-    response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
-    response.headers.add('Access-Control-Allow-Credentials', 'true')
+    response.headers.add("Access-Control-Allow-Origin", "*")
+    response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+    response.headers.add("Access-Control-Allow-Methods", "GET,PUT,POST,DELETE,OPTIONS")
+    response.headers.add("Access-Control-Allow-Credentials", "true")
     return response
 
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-CACHE_DIR = 'cache'
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
+# Метрики в формате Prometheus: каждый воркер пишет свои значения в METRICS_DIR, /metrics суммирует все воркеры
+metrics = MetricsRegistry(os.environ.get("METRICS_DIR", os.path.join(CACHE_DIR, "metrics")))
+metrics.counter("http_requests_total", "Requests to the server by endpoint, method and status")
+metrics.histogram("http_request_seconds", "Request handling time by endpoint (without streaming)")
+metrics.histogram(
+    "search_stage_seconds",
+    "Duration of search stages: cache_lookup, local_search, listing_fetch, detail_fetch, crawl, "
+    "salary_normalization, salary_prediction, statistics, indexing, serialization",
+)
+metrics.counter("cache_requests_total", "Cache lookups by cache (results, vacancies) and result (hit, miss)")
+metrics.histogram("hh_request_seconds", "Requests to hh.ru API (with retries) by endpoint")
+metrics.counter("hh_responses_total", "Responses of hh.ru API by endpoint and status or exception")
+metrics.histogram(
+    "hh_rate_limit_wait_seconds",
+    "Time spent waiting for the hh.ru rate limiter",
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def hh_endpoint(url):
+    path = urlsplit(url).path.rstrip("/")
+    if path.endswith("/vacancies"):
+        return "listing"
+    if "/vacancies/" in path:
+        return "vacancy"
+    return "other"
+
+
+def observe_hh_request(url, seconds, outcome):
+    endpoint = hh_endpoint(url)
+    metrics.observe("hh_request_seconds", seconds, endpoint=endpoint)
+    metrics.inc("hh_responses_total", endpoint=endpoint, status=outcome)
+    if endpoint == "listing":
+        metrics.observe("search_stage_seconds", seconds, stage="listing_fetch")
+
+
+# Ограничение запросов к API hh.ru: общий token bucket на процесс вместо sleep после каждой вакансии
+HH_RATE_LIMIT = float(os.environ.get("HH_RATE_LIMIT", 8))
+HH_MAX_WORKERS = int(os.environ.get("HH_MAX_WORKERS", 8))
+HH_PAGE_WORKERS = int(os.environ.get("HH_PAGE_WORKERS", 4))
+STREAM_STATS_EVERY = int(os.environ.get("STREAM_STATS_EVERY", 10))
+hh_rate_limiter = RateLimiter(
+    rate=HH_RATE_LIMIT, on_wait=lambda seconds: metrics.observe("hh_rate_limit_wait_seconds", seconds)
+)
+# Общий пул keep-alive соединений (размер пула задается через HTTP_POOL_SIZE)
+http_client = get_client()
+http_client.add_observer(observe_hh_request)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    if "request_start" in g:
+        metrics.observe("http_request_seconds", time.perf_counter() - g.request_start, endpoint=endpoint)
+    metrics.inc("http_requests_total", endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+
+# Курсы валют для пересчета зарплат в рубли: последний сохраненный снимок курсов,
+# устаревшие курсы обновляются в фоне и не блокируют запуск и запросы
+SETTINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+with open(SETTINGS_PATH, "r") as cfg:
+    DEFAULT_RATES = json.load(cfg).get("rates") or {}
+exchanger = Exchanger(SETTINGS_PATH, client=http_client)
+
+
+def get_salary_normalizer():
+    exchanger.refresh_async()
+    return SalaryNormalizer({**DEFAULT_RATES, **(exchanger.latest_rates() or {})})
+
+
+# Модель предсказания зарплат (обучается командой `python researcher.py --train`):
+# загружается один раз на воркер, новая версия подхватывается без перезапуска. Без scikit-learn не используется
+PREDICT_SALARIES = os.environ.get("PREDICT_SALARIES", "1") != "0"
+salary_model = LatestSalaryModel(os.environ.get("SALARY_MODEL_DIR", MODEL_DIR))
+
+
+def predict_missing_salaries(vacancies, descriptions=None):
+    model = salary_model.get() if PREDICT_SALARIES else None
+    if model is None:
+        return
+    # Описания вакансий нужны только модели и не попадают в ответ
+    records = [{**vacancy, "description": (descriptions or {}).get(vacancy["id"])} for vacancy in vacancies]
+    try:
+        # Вакансии без зарплаты получают поле salary_predicted, статистика считается только по реальным зарплатам
+        model.predict_missing(records)
+    except Exception as e:
+        logger.error(f"Salary prediction failed: {str(e)}")
+        return
+    for vacancy, record in zip(vacancies, records):
+        if "salary_predicted" in record:
+            vacancy["salary_predicted"] = record["salary_predicted"]
+
+
+# Кэш результатов поиска: LRU в памяти поверх файлов на диске, с TTL и ограничением размера каталога.
+# Результаты хранятся готовыми к отправке: сериализованными в JSON и сжатыми gzip (и brotli, если установлен)
+result_cache = ResponseCache(
+    CACHE_DIR,
+    max_items=int(os.environ.get("CACHE_MAX_ITEMS", 128)),
+    ttl=float(os.environ.get("CACHE_TTL", 6 * 3600)),
+    max_disk_bytes=int(os.environ.get("CACHE_MAX_BYTES", 100 * 2**20)),
+)
+
+# Объединение одинаковых одновременных запросов: между потоками и между воркерами через lock-файлы
+search_flight = SingleFlight(lock_dir=os.path.join(CACHE_DIR, "locks"))
+
+# Фоновые задачи поиска для больших запросов: состояние хранится на диске и доступно всем воркерам
+search_jobs = JobManager(
+    max_workers=int(os.environ.get("JOB_WORKERS", 2)),
+    max_queued=int(os.environ.get("JOB_QUEUE_SIZE", 16)),
+    state_dir=os.path.join(CACHE_DIR, "jobs"),
+)
+
+
+def get_cache_key(query, region_id, num_vacancies, experience=None):
+    # Ключ не зависит от регистра и лишних пробелов: "Python" и "python " совпадают
+    return normalize_key(query, region_id, num_vacancies, experience if experience else "all")
+
+
+def get_cached_response(query, region_id, num_vacancies, experience=None):
+    with metrics.timer("search_stage_seconds", stage="cache_lookup"):
+        response = result_cache.get(get_cache_key(query, region_id, num_vacancies, experience))
+    metrics.inc("cache_requests_total", cache="results", result="miss" if response is None else "hit")
+    return response
 
-def get_cache_path(query, region_id, num_vacancies, experience=None):
-    # Создаем уникальный ключ кэша с учетом опыта работы
-    cache_key = f"{query}_{region_id}_{num_vacancies}_{experience if experience else 'all'}"
-    return os.path.join(CACHE_DIR, f"{cache_key}.json")
 
 def get_cached_data(query, region_id, num_vacancies, experience=None):
-    cache_path = get_cache_path(query, region_id, num_vacancies, experience)
-    if os.path.exists(cache_path):
-        with open(cache_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return None
+    response = get_cached_response(query, region_id, num_vacancies, experience)
+    return response.data() if response is not None else None
+
 
 def save_to_cache(query, region_id, num_vacancies, data, experience=None):
-    cache_path = get_cache_path(query, region_id, num_vacancies, experience)
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    with open(cache_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    with metrics.timer("search_stage_seconds", stage="serialization"):
+        response = EncodedResponse.from_data(data)
+    result_cache.set(get_cache_key(query, region_id, num_vacancies, experience), response)
+    return response
+
+
+def send_encoded(encoded):
+    # Повторный запрос с тем же ETag в If-None-Match получает 304 без тела
+    if request.if_none_match.contains_weak(encoded.etag):
+        response = Response(status=304)
+    else:
+        encoding = next((name for name in encoded.encodings if request.accept_encodings[name]), None)
+        response = Response(encoded.body(encoding), mimetype="application/json")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    # ETag слабый: gzip, brotli и несжатый ответ - одно и то же содержимое
+    response.set_etag(encoded.etag, weak=True)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.no_cache = True
+    return response
+
+
+# Детали вакансий кэшируются по id и переиспользуются разными поисковыми запросами
+vacancy_cache = get_vacancy_cache()
+
+# Локальный полнотекстовый индекс (SQLite FTS5) всех найденных вакансий: поиск с mode=local отвечает из него,
+# а обход hh.ru запускается в фоне только для обновления индекса. LOCAL_INDEX_MAX_AGE - возраст вакансий в ответе
+LOCAL_INDEX = os.environ.get("LOCAL_INDEX", "1") != "0"
+LOCAL_INDEX_MAX_AGE = float(os.environ.get("LOCAL_INDEX_MAX_AGE", 7 * 24 * 3600))
+# Потоковый поиск записывает вакансии в индекс пачками по INDEX_BATCH_SIZE, не накапливая весь результат
+INDEX_BATCH_SIZE = int(os.environ.get("INDEX_BATCH_SIZE", 50))
+vacancy_index = get_vacancy_index()
+
+
+def vacancy_extra(vacancy_data):
+    # Из деталей вакансии остаются только регион и очищенное описание, сырой JSON с HTML не хранится
+    return {
+        "area": (vacancy_data.get("area") or {}).get("id"),
+        "description": html_to_text(vacancy_data.get("description")),
+    }
+
+
+def index_vacancies(records):
+    # Записи - вакансии вместе с полями area и description из vacancy_extra
+    if not LOCAL_INDEX or not records:
+        return
+    try:
+        vacancy_index.upsert(records)
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to update the vacancy index: {str(e)}")
 
+
+@metrics.timed("search_stage_seconds", stage="detail_fetch")
 def get_vacancy_details(vacancy_id):
-    url = f'https://api.hh.ru/vacancies/{vacancy_id}'
+    cached = vacancy_cache.get(vacancy_id)
+    metrics.inc("cache_requests_total", cache="vacancies", result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
+
+    url = f"{HH_API_URL}/vacancies/{vacancy_id}"
     headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
     try:
-        response = requests.get(url, headers=headers)
+        # Токен лимитера берется только перед запросом к hh.ru: попадания в кэш не ограничиваются
+        hh_rate_limiter.acquire()
+        response = http_client.get(url, headers=headers)
         response.raise_for_status()
-        return response.json()
+        vacancy = response.json()
+        vacancy_cache.set(vacancy_id, vacancy)
+        return vacancy
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching vacancy details: {str(e)}")
         return None
 
-def calculate_skill_statistics(vacancies):
-    skill_counts = {}
-    vacancies_with_skills = 0
-    
-    # Сначала собираем все навыки из вакансий, где они указаны
-    for vacancy in vacancies:
-        if vacancy.get('key_skills') and len(vacancy['key_skills']) > 0:
-            vacancies_with_skills += 1
-            for skill in vacancy['key_skills']:
-                if skill and isinstance(skill, str) and skill.strip():
-                    clean_skill = skill.strip()
-                    skill_counts[clean_skill] = skill_counts.get(clean_skill, 0) + 1
-    
-    # Сортируем навыки по частоте и берем топ-20
-    top_skills = dict(sorted(skill_counts.items(), key=lambda x: x[1], reverse=True)[:20])
-    
-    # Добавляем информацию о количестве вакансий с навыками
+
+@app.route("/api/cache/stats")
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def create_paginator():
+    url = f"{HH_API_URL}/vacancies"
+    return VacancyPaginator(url, client=http_client, limiter=hh_rate_limiter, max_workers=HH_PAGE_WORKERS)
+
+
+def iter_vacancies(paginator, query, region_id, num_vacancies, experience=None, progress=None, extras=None):
+    params = {
+        "text": query,
+        "area": region_id,
+    }
+
+    # Добавляем параметр опыта работы, если он указан
+    if experience:
+        experience_map = {
+            "noExperience": "noExperience",
+            "between1And3": "between1And3",
+            "between3And6": "between3And6",
+            "moreThan6": "moreThan6",
+        }
+        if experience in experience_map:
+            params["experience"] = experience_map[experience]
+
+    # Страницы выдачи загружаются параллельно, детали вакансий запрашиваются по мере их поступления
+    items = paginator.iter_items(params, limit=num_vacancies)
+    fetcher = ConcurrentFetcher(max_workers=HH_MAX_WORKERS)
+    fetched_details = fetcher.map_pairs(lambda item: get_vacancy_details(item.get("id")), items)
+
+    fetched = 0
+    for item, vacancy_data in fetched_details:
+        fetched += 1
+        if progress:
+            progress(fetched, min(paginator.found, num_vacancies))
+        try:
+            if not vacancy_data:
+                continue
+
+            key_skills = []
+            if vacancy_data and "key_skills" in vacancy_data:
+                key_skills = [
+                    skill.get("name", "").strip() for skill in vacancy_data["key_skills"] if skill and skill.get("name")
+                ]
+                logger.info(f"Skills for vacancy {item.get('id')}: {key_skills}")
+
+            salary = item.get("salary", {}) or {}
+            vacancy = {
+                "id": item.get("id"),
+                "name": item.get("name"),
+                "employer": {
+                    "name": item.get("employer", {}).get("name") if item.get("employer") else None,
+                    "url": item.get("employer", {}).get("alternate_url") if item.get("employer") else None,
+                },
+                "salary_from": salary.get("from") if salary else None,
+                "salary_to": salary.get("to") if salary else None,
+                "salary_currency": salary.get("currency") if salary else None,
+                "salary_gross": salary.get("gross") if salary else None,
+                "experience": item.get("experience", {}).get("name") if item.get("experience") else None,
+                "key_skills": key_skills,
+            }
+        except Exception as e:
+            logger.error(f"Error processing vacancy {item.get('id')}: {str(e)}")
+            continue
+        if extras is not None:
+            extras[vacancy["id"]] = vacancy_extra(vacancy_data)
+        yield vacancy
+
+
+def run_search(query, region_id, num_vacancies, experience=None, progress=None):
+    paginator = create_paginator()
+    # Описания очищаются от HTML только для локального индекса и модели предсказания зарплат
+    extras = {} if LOCAL_INDEX or (PREDICT_SALARIES and salary_model.get()) else None
+    with metrics.timer("search_stage_seconds", stage="crawl"):
+        vacancies = list(iter_vacancies(paginator, query, region_id, num_vacancies, experience, progress, extras))
+    descriptions = {vacancy_id: extra["description"] for vacancy_id, extra in (extras or {}).items()}
+    with metrics.timer("search_stage_seconds", stage="salary_normalization"):
+        # Зарплаты всех вакансий переводятся в рубли (net) за один векторизованный проход
+        get_salary_normalizer().normalize_records(vacancies)
+    with metrics.timer("search_stage_seconds", stage="salary_prediction"):
+        predict_missing_salaries(vacancies, descriptions)
+    with metrics.timer("search_stage_seconds", stage="statistics"):
+        stats = VacancyStatistics().update(vacancies)
+    if extras is not None:
+        with metrics.timer("search_stage_seconds", stage="indexing"):
+            index_vacancies([{**vacancy, **extras[vacancy["id"]]} for vacancy in vacancies])
+
+    return {"vacancies": vacancies, "statistics": stats.summary(paginator.found)}
+
+
+def search_encoded(query, region_id, num_vacancies, experience=None, progress=None):
+    # Проверяем кэш с учетом опыта работы
+    cached = get_cached_response(query, region_id, num_vacancies, experience)
+    if cached is not None:
+        logger.info("Returning cached data")
+        return cached
+
+    def compute():
+        # Пока мы ждали, одинаковый запрос мог быть выполнен другим потоком или воркером
+        cached = get_cached_response(query, region_id, num_vacancies, experience)
+        if cached is not None:
+            return cached
+        result = run_search(query, region_id, num_vacancies, experience, progress)
+        # Сохраняем в кэш с учетом опыта работы
+        return save_to_cache(query, region_id, num_vacancies, result, experience)
+
+    # Одновременные одинаковые запросы ждут одного общего обхода hh.ru
+    return search_flight.do(get_cache_key(query, region_id, num_vacancies, experience), compute)
+
+
+def search_cached(query, region_id, num_vacancies, experience=None, progress=None):
+    # Фоновые задачи хранят результат как данные, а не как готовый ответ
+    return search_encoded(query, region_id, num_vacancies, experience, progress).data()
+
+
+def local_vacancy(record):
+    # Вакансия из индекса в формате ответа /api/search
     return {
-        'skills': top_skills,
-        'total_vacancies_with_skills': vacancies_with_skills
+        "id": record["id"],
+        "name": record["name"],
+        "employer": {"name": record["employer"], "url": record["employer_url"]},
+        "salary_from": int(record["salary_from"]) if record["salary_from"] is not None else None,
+        "salary_to": int(record["salary_to"]) if record["salary_to"] is not None else None,
+        "salary_currency": record["salary_currency"],
+        "experience": record["experience"],
+        "key_skills": record["key_skills"],
+        "unknown_currency": record["unknown_currency"],
     }
 
-@app.route('/api/search', methods=['GET', 'POST'])
+
+def refresh_local_index(query, region_id, num_vacancies, experience=None):
+    # Индекс пополняется фоновым обходом hh.ru, если этот запрос не выполнялся в пределах TTL кэша
+    if get_cached_response(query, region_id, num_vacancies, experience) is not None:
+        return None
+    params = {"query": query, "region": region_id, "num_vacancies": num_vacancies, "experience": experience}
+    try:
+        return search_jobs.submit(
+            lambda progress: search_cached(query, region_id, num_vacancies, experience, progress), params
+        )
+    except JobQueueFull as e:
+        logger.warning(f"Local index is not refreshed: {str(e)}")
+        return None
+
+
+def search_local(query, region_id, num_vacancies, experience=None):
+    # Регион 113 (вся Россия) не фильтруется: в индексе хранится конкретный регион вакансии
+    area = None if str(region_id) in ("", "113") else region_id
+    with metrics.timer("search_stage_seconds", stage="local_search"):
+        total, records = vacancy_index.search(query, num_vacancies, area, experience, LOCAL_INDEX_MAX_AGE)
+    vacancies = [local_vacancy(record) for record in records]
+    with metrics.timer("search_stage_seconds", stage="salary_prediction"):
+        predict_missing_salaries(vacancies, {record["id"]: record["description"] for record in records})
+    with metrics.timer("search_stage_seconds", stage="statistics"):
+        stats = VacancyStatistics().update(vacancies)
+
+    result = {"vacancies": vacancies, "statistics": stats.summary(total), "source": "local"}
+    job = refresh_local_index(query, region_id, num_vacancies, experience)
+    if job is not None:
+        result["refresh_job"] = job.id
+    return result
+
+
+def get_search_params():
+    if request.method == "POST":
+        data = request.get_json()
+        query = data.get("query")
+        num_vacancies = data.get("num_vacancies", 20)
+        region_id = data.get("region", "113")
+        experience = data.get("experience")
+    else:
+        query = request.args.get("query", "")
+        num_vacancies = int(request.args.get("num_vacancies", 20))
+        region_id = request.args.get("region", "113")
+        experience = request.args.get("experience")
+    return query, region_id, num_vacancies, experience
+
+
+def get_search_mode():
+    # upstream - обход hh.ru (по умолчанию), local - ответ из локального индекса вакансий
+    data = (request.get_json(silent=True) or {}) if request.method == "POST" else request.args
+    return data.get("mode") or "upstream"
+
+
+@app.route("/api/search", methods=["GET", "POST"])
 def search():
     logger.info(f"Received {request.method} request to /api/search")
     logger.info(f"Request headers: {dict(request.headers)}")
-    
+
     try:
-        if request.method == 'POST':
-            data = request.get_json()
-            query = data.get('query')
-            num_vacancies = data.get('num_vacancies', 20)
-            region_id = data.get('region', '113')
-            experience = data.get('experience')
+        query, region_id, num_vacancies, experience = get_search_params()
+
+        logger.info(
+            f"Search parameters: query={query}, region_id={region_id}, num_vacancies={num_vacancies}, experience={experience}"
+        )
+
+        if get_search_mode() == "local" and LOCAL_INDEX:
+            result = search_local(query, region_id, num_vacancies, experience)
+            logger.info(f"Returning {len(result['vacancies'])} vacancies from the local index")
+            with metrics.timer("search_stage_seconds", stage="serialization"):
+                encoded = EncodedResponse.from_data(result)
         else:
-            query = request.args.get('query', '')
-            num_vacancies = int(request.args.get('num_vacancies', 20))
-            region_id = request.args.get('region', '113')
-            experience = request.args.get('experience')
-
-        logger.info(f"Search parameters: query={query}, region_id={region_id}, num_vacancies={num_vacancies}, experience={experience}")
-        
-        # Проверяем кэш с учетом опыта работы
-        cached_data = get_cached_data(query, region_id, num_vacancies, experience)
-        if cached_data:
-            logger.info("Returning cached data")
-            return jsonify(cached_data)
-        
-        url = f'https://api.hh.ru/vacancies'
-        params = {
-            'text': query,
-            'area': region_id,
-            'per_page': num_vacancies,
-            'page': 0
-        }
-        
-        # Добавляем параметр опыта работы, если он указан
-        if experience:
-            experience_map = {
-                'noExperience': 'noExperience',
-                'between1And3': 'between1And3',
-                'between3And6': 'between3And6',
-                'moreThan6': 'moreThan6'
-            }
-            if experience in experience_map:
-                params['experience'] = experience_map[experience]
-        
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        vacancies = []
-        for item in data.get('items', [])[:num_vacancies]:
-            try:
-                vacancy_data = get_vacancy_details(item.get('id'))
-                if not vacancy_data:
-                    continue
-                
-                key_skills = []
-                if vacancy_data and 'key_skills' in vacancy_data:
-                    key_skills = [skill.get('name', '').strip() for skill in vacancy_data['key_skills'] if skill and skill.get('name')]
-                    logger.info(f"Skills for vacancy {item.get('id')}: {key_skills}")
-                
-                salary = item.get('salary', {}) or {}
-                vacancy = {
-                    'id': item.get('id'),
-                    'name': item.get('name'),
-                    'employer': {
-                        'name': item.get('employer', {}).get('name') if item.get('employer') else None,
-                        'url': item.get('employer', {}).get('alternate_url') if item.get('employer') else None
-                    },
-                    'salary_from': salary.get('from') if salary else None,
-                    'salary_to': salary.get('to') if salary else None,
-                    'experience': item.get('experience', {}).get('name') if item.get('experience') else None,
-                    'key_skills': key_skills
-                }
-                vacancies.append(vacancy)
-                
-                time.sleep(0.25)
-            except Exception as e:
-                logger.error(f"Error processing vacancy {item.get('id')}: {str(e)}")
-                continue
-        
-        # Собираем статистику по всем вакансиям
-        salary_stats = calculate_salary_stats(vacancies)
-        experience_distribution = calculate_experience_distribution(vacancies)
-        skills_stats = calculate_skill_statistics(vacancies)
-        
-        result = {
-            'vacancies': vacancies,
-            'statistics': {
-                'total': data.get('found', 0),
-                'salary_stats': salary_stats,
-                'experience_distribution': experience_distribution,
-                'top_skills': skills_stats['skills'],
-                'skills_stats': {
-                    'total_vacancies_with_skills': skills_stats['total_vacancies_with_skills']
-                }
-            }
-        }
-        
-        # Сохраняем в кэш с учетом опыта работы
-        save_to_cache(query, region_id, num_vacancies, result, experience)
-        logger.info(f"Returning {len(vacancies)} vacancies")
-        return jsonify(result)
-        
+            # Результат из кэша отправляется готовыми байтами, без разбора и повторной сериализации JSON
+            encoded = search_encoded(query, region_id, num_vacancies, experience)
+            logger.info(f"Returning search result {encoded.etag}")
+        return send_encoded(encoded)
+
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching data: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return jsonify({"error": str(e)}), 500
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
-
-def calculate_salary_stats(vacancies):
-    salaries = []
-    for vacancy in vacancies:
-        if vacancy['salary_from']:
-            salaries.append(vacancy['salary_from'])
-        if vacancy['salary_to']:
-            salaries.append(vacancy['salary_to'])
-    
-    if not salaries:
-        return {'min': 0, 'max': 0, 'mean': 0, 'median': 0}
-    
-    salaries.sort()
-    return {
-        'min': min(salaries),
-        'max': max(salaries),
-        'mean': sum(salaries) / len(salaries),
-        'median': salaries[len(salaries) // 2]
-    }
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route("/api/search/stream")
+def search_stream():
+    # Server-Sent Events: каждая вакансия отправляется сразу после обработки,
+    # промежуточная статистика - каждые STREAM_STATS_EVERY вакансий
+    query, region_id, num_vacancies, experience = get_search_params()
+    logger.info(
+        f"Stream search: query={query}, region_id={region_id}, num_vacancies={num_vacancies}, experience={experience}"
+    )
+
+    def generate():
+        cached_data = get_cached_data(query, region_id, num_vacancies, experience)
+        if cached_data:
+            for vacancy in cached_data["vacancies"]:
+                yield sse_event("vacancy", vacancy)
+            yield sse_event("done", cached_data["statistics"])
+            return
 
-def calculate_experience_distribution(vacancies):
-    distribution = {}
-    for vacancy in vacancies:
-        exp = vacancy['experience'] or 'Не указан'
-        distribution[exp] = distribution.get(exp, 0) + 1
-    return distribution
+        paginator = create_paginator()
+        stats = VacancyStatistics()
+        salary_normalizer = get_salary_normalizer()
+        count = 0
+        # В памяти остается только статистика и пачка вакансий для индекса, а не весь результат
+        batch = []
+        try:
+            extras = {} if LOCAL_INDEX or (PREDICT_SALARIES and salary_model.get()) else None
+            for vacancy in iter_vacancies(paginator, query, region_id, num_vacancies, experience, extras=extras):
+                salary_normalizer.normalize_records([vacancy])
+                if extras is not None:
+                    extra = extras.pop(vacancy["id"])
+                    predict_missing_salaries([vacancy], {vacancy["id"]: extra["description"]})
+                    batch.append({**vacancy, **extra})
+                stats.add(vacancy)
+                count += 1
+                yield sse_event("vacancy", vacancy)
+                if count % STREAM_STATS_EVERY == 0:
+                    yield sse_event("statistics", stats.summary(paginator.found))
+                if len(batch) >= INDEX_BATCH_SIZE:
+                    index_vacancies(batch)
+                    batch = []
+        except Exception as e:
+            logger.error(f"Error in search stream: {str(e)}")
+            yield sse_event("error", {"error": str(e)})
+            return
+        finally:
+            # Вакансии, уже отправленные клиенту, попадают в индекс и при ошибке или разрыве соединения
+            index_vacancies(batch)
+        yield sse_event("done", stats.summary(paginator.found))
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+
+
+@app.route("/api/jobs", methods=["POST"])
+def create_search_job():
+    try:
+        query, region_id, num_vacancies, experience = get_search_params()
+    except Exception as e:
+        return jsonify({"error": f"Invalid parameters: {str(e)}"}), 400
+
+    params = {"query": query, "region": region_id, "num_vacancies": num_vacancies, "experience": experience}
+    logger.info(f"Create search job: {params}")
+    try:
+        job = search_jobs.submit(
+            lambda progress: search_cached(query, region_id, num_vacancies, experience, progress), params
+        )
+    except JobQueueFull as e:
+        logger.warning(str(e))
+        return jsonify({"error": "Too many search jobs, try again later"}), 503
+    return jsonify(job.to_dict()), 202
+
+
+@app.route("/api/jobs/<job_id>")
+def get_search_job(job_id):
+    job = search_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/jobs/<job_id>/result")
+def get_search_job_result(job_id):
+    job = search_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status == Job.FAILED:
+        return jsonify(job.to_dict()), 500
+    if job.status != Job.DONE:
+        return jsonify(job.to_dict()), 202
+    return jsonify(job.result)
+
+
+# Файлы сборки с хэшем содержимого в имени (bundle.<hash>.js) не меняются и кэшируются браузером на год,
+# остальные статические файлы - на STATIC_MAX_AGE секунд, index.html проверяется при каждом запросе
+HASHED_ASSET = re.compile(r"\.[0-9a-f]{8,}\.\w+$")
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", 3600))
+
+
+@app.route("/", defaults={"path": ""})
+@app.route("/<path:path>")
 def serve(path):
-    if path != "" and os.path.exists(app.static_folder + '/' + path):
-        return send_from_directory(app.static_folder, path)
-    else:
-        return send_from_directory(app.static_folder, 'index.html')
+    if path != "" and path != "index.html":
+        hashed = HASHED_ASSET.search(path) is not None
+        try:
+            response = send_from_directory(
+                app.static_folder, path, max_age=365 * 24 * 3600 if hashed else STATIC_MAX_AGE
+            )
+        except NotFound:
+            # Маршруты фронтенда (не файлы) отдаются через index.html
+            return send_from_directory(app.static_folder, "index.html")
+        if hashed:
+            response.cache_control.immutable = True
+        return response
+    return send_from_directory(app.static_folder, "index.html")
+
 
-if __name__ == '__main__':
-    app.run(host='127.0.0.1', port=3001, debug=True) 
\ No newline at end of file
+if __name__ == "__main__":
+    app.run(host="127.0.0.1", port=3001, debug=True)
@@ -1,57 +1,97 @@
-import re
-from typing import Dict, List
-
-import matplotlib.pyplot as plt
-import nltk
-import numpy as np
-import pandas as pd
-import seaborn as sns
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from src.statistics import SalaryStats
+from src.text import EXTRA_STOPWORDS, count_words, get_stopwords, iter_words
+from src.vacancy_store import VacancyTable
+
+# pandas is imported on first use: CLI starts collecting vacancies without waiting for it
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def count_keys(keys_list: Iterable) -> Counter:
+    """Key skills (lower case, without quotes) of all vacancies with their counts."""
+    return Counter(el.lower().replace("'", "") for keys_elem in keys_list for el in keys_elem if el != "")
+
+
+def aggregate_shard(
+    keys_list: List, descriptions: List, salaries_from: List, salaries_to: List, stopwords: FrozenSet[str]
+) -> Tuple[Counter, Counter, SalaryStats]:
+    """Key skills counter, description words counter and salary statistics of one shard of vacancies."""
+    salary = SalaryStats()
+    for values in (salaries_from, salaries_to):
+        for value in values:
+            # Missing salaries are NaN (or None) in DataFrame columns
+            if value is not None and value == value:
+                salary.add(value)
+    return count_keys(keys_list), Counter(iter_words(descriptions, stopwords=stopwords)), salary
 
 
 class Analyzer:
-    def __init__(self, save_csv: bool = False):
+    """Statistics of collected vacancies.
+
+    Parameters
+    ----------
+    save_csv : bool
+        Save the prepared DataFrame to `hh_results.csv`.
+    num_workers : int
+        Number of processes for key skills, description words and salary aggregation of large
+        corpora. `1` - count in the current process.
+    """
+
+    # Smaller corpora are counted faster than processes start
+    PARALLEL_MIN_VACANCIES = 5000
+    # Shards per worker: workers which finish early take the next shard
+    SHARDS_PER_WORKER = 4
+
+    def __init__(self, save_csv: bool = False, num_workers: int = 1):
         self.save_csv = save_csv
+        self.num_workers = max(1, num_workers or 1)
 
     @staticmethod
-    def find_top_words_from_keys(keys_list: List) -> pd.Series:
-        lst_keys = []
-        for keys_elem in keys_list:
-            for el in keys_elem:
-                if el != "":
-                    lst_keys.append(re.sub("'", "", el.lower()))
-
-        set_keys = set(lst_keys)
-        dct_keys = {el: lst_keys.count(el) for el in set_keys}
-        srt_keys = dict(sorted(dct_keys.items(), key=lambda x: x[1], reverse=True))
-        return pd.Series(srt_keys, name="Keys")
+    def find_top_words_from_keys(keys_list: List, top_k: Optional[int] = None) -> "pd.Series":
+        """Count key skills (lower case, without quotes) in one pass over all vacancies.
+
+        Parameters
+        ----------
+        keys_list : list
+            List of key skills lists, one per vacancy.
+        top_k : int
+            Return only `top_k` most frequent skills. All skills by default.
+        """
+        import pandas as pd
+
+        return pd.Series(dict(count_keys(keys_list).most_common(top_k)), name="Keys", dtype="int64")
 
     @staticmethod
-    def find_top_words_from_description(desc_list: List) -> pd.Series:
-        words_ls = " ".join([re.sub(" +", " ", re.sub(r"\d+", "", el.strip().lower())) for el in desc_list])
-        words_re = re.findall("[a-zA-Z]+", words_ls)
-        words_l2 = [el for el in words_re if len(el) > 2]
-        words_st = set(words_l2)
-        try:
-            _ = nltk.corpus.stopwords.words("english")
-        except LookupError:
-            nltk.download("stopwords")
-        finally:
-            stop_words = set(nltk.corpus.stopwords.words("english"))
-
-        words_st ^= stop_words
-        words_st ^= {"amp", "quot"}
-        words_cnt = {el: words_l2.count(el) for el in words_st}
-        return pd.Series(dict(sorted(words_cnt.items(), key=lambda x: x[1], reverse=True)))
-
-    def prepare_df(self, vacancies: Dict) -> pd.DataFrame:
+    def find_top_words_from_description(desc_list: List, top_k: Optional[int] = None) -> "pd.Series":
+        """Count latin words (without digits, stopwords and words shorter than 3 letters) in descriptions.
+
+        Descriptions are tokenized one by one, so memory does not depend on the corpus size.
+        """
+        import pandas as pd
+
+        stop_words = get_stopwords("english") | EXTRA_STOPWORDS
+        return pd.Series(dict(count_words(desc_list, top_k=top_k, stopwords=stop_words)), dtype="int64")
+
+    def prepare_df(self, vacancies: Union[VacancyTable, Dict]) -> "pd.DataFrame":
+        import pandas as pd
+
         if not vacancies:
             print("[WARNING] No vacancies data received")
             return pd.DataFrame()
 
-        df = pd.DataFrame.from_dict(vacancies, orient='index')
+        if isinstance(vacancies, VacancyTable):
+            # Columns are read straight from the memory-mapped table, no dict-of-dicts is built
+            df = vacancies.to_dataframe()
+        else:
+            df = pd.DataFrame.from_dict(vacancies, orient="index")
         print(f"[DEBUG] DataFrame columns: {df.columns.tolist()}")
-        
+
         with pd.option_context("display.max_rows", None, "display.max_columns", None):
             if "has_salary" in df.columns:
                 print(df[df["has_salary"]][["name", "salary_from", "salary_to", "experience"]][0:15])
@@ -62,30 +102,50 @@ class Analyzer:
                 else:
                     print("Available columns:", df.columns.tolist())
                     print(df.head())
-                
+
         if self.save_csv:
             print("\n\n[INFO]: Save dataframe to file...")
             csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "hh_results.csv")
-            df[['id', 'name', 'employer', 'salary_from', 'salary_to', 'experience', 'key_skills']].to_csv(csv_path, index=False)
+            df[["id", "name", "employer", "salary_from", "salary_to", "experience", "key_skills"]].to_csv(
+                csv_path, index=False
+            )
             print(f"[INFO] Saved results to: {csv_path}")
         return df
 
-    def get_most_common_words(self, series: pd.Series, n: int = 10) -> pd.Series:
-        all_words = []
-        for words in series:
-            if isinstance(words, list):
-                all_words.extend(words)
-        
-        word_counts = pd.Series(all_words).value_counts()
-        
-        return word_counts.head(n)
-
-    def analyze_df(self, df: pd.DataFrame) -> None:
+    def aggregate(self, df: "pd.DataFrame") -> Tuple[Counter, Counter, SalaryStats]:
+        """Count key skills and description words and collect salary statistics of all vacancies.
+
+        Corpora of `PARALLEL_MIN_VACANCIES` and more are split into shards which are aggregated
+        in a pool of `num_workers` processes. Partial results are merged in the order of shards,
+        so the merged counters are equal to the sequential ones (including the order of ties).
+        """
+        names = ("key_skills", "description", "salary_from", "salary_to")
+        columns = [df[name].tolist() if name in df.columns else [] for name in names]
+        stopwords = get_stopwords("english") | EXTRA_STOPWORDS
+        if self.num_workers == 1 or len(df) < self.PARALLEL_MIN_VACANCIES:
+            return aggregate_shard(*columns, stopwords)
+
+        size = -(-len(df) // (self.num_workers * self.SHARDS_PER_WORKER))
+        shards = [[column[start : start + size] for column in columns] for start in range(0, len(df), size)]
+        keys, words, salary = Counter(), Counter(), SalaryStats()
+        with ProcessPoolExecutor(max_workers=self.num_workers) as pool:
+            for shard_keys, shard_words, shard_salary in pool.map(
+                aggregate_shard, *zip(*shards), repeat(stopwords, len(shards))
+            ):
+                keys.update(shard_keys)
+                words.update(shard_words)
+                salary.merge(shard_salary)
+        return keys, words, salary
+
+    def analyze_df(self, df: "pd.DataFrame") -> None:
+        import pandas as pd
+
         if df.empty:
             print("[WARNING] No data to analyze")
             return
 
         print("\nNumber of vacancies:", len(df))
+        keys, words, salary = self.aggregate(df)
 
         if "salary_to" in df.columns and "salary_from" in df.columns:
             print("\nVacancy with max salary: ")
@@ -97,20 +157,20 @@ class Analyzer:
             df_stat = df[["salary_from", "salary_to"]].describe().applymap(lambda x: int(x) if pd.notnull(x) else x)
             print(df_stat)
 
-            print("\nAverage statistics (filter for \"salary_from\"-\"salary_to\" parameters):")
-            salary = pd.concat([df["salary_from"], df["salary_to"]]).dropna()
-            print("Describe salary series:")
-            print(f"Min    : {int(salary.min())}")
-            print(f"Max    : {int(salary.max())}")
-            print(f"Mean   : {int(salary.mean())}")
-            print(f"Median : {int(salary.median())}")
+            print('\nAverage statistics (filter for "salary_from"-"salary_to" parameters):')
+            if salary.count:
+                print("Describe salary series:")
+                print(f"Min    : {int(salary.min)}")
+                print(f"Max    : {int(salary.max)}")
+                print(f"Mean   : {int(salary.mean)}")
+                print(f"Median : {int(salary.median)}")
 
         if "key_skills" in df.columns:
             print("\nMost frequently used words [Keywords]:")
-            print(self.find_top_words_from_keys(df["key_skills"].tolist()))
+            print(pd.Series(dict(keys.most_common()), name="Keys", dtype="int64"))
         if "description" in df.columns:
             print("\nMost frequently used words [Description]:")
-            print(self.find_top_words_from_description(df["description"].tolist()))
+            print(pd.Series(dict(words.most_common()), dtype="int64"))
 
 
 if __name__ == "__main__":
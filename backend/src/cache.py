@@ -0,0 +1,295 @@
+"""Two-tier cache: bounded in-memory LRU in front of a JSON directory on disk."""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # Responses are compressed with gzip only
+    brotli = None
+
+# Base directory of all caches (search results, vacancy details, index, locks, jobs, metrics, rates).
+# It does not depend on the working directory, so the CLI and the server share one tree. Set with CACHE_DIR
+CACHE_DIR = os.environ.get(
+    "CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+)
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_key(*parts) -> str:
+    """Build a cache key which does not depend on case and extra spaces: ("Python ", 1) -> "python|1"."""
+    return "|".join(_SPACES.sub(" ", str(part if part is not None else "")).strip().lower() for part in parts)
+
+
+class ResultCache:
+    """LRU + disk cache with per-entry TTL and size-bounded cache directory.
+
+    Parameters
+    ----------
+    directory : str
+        Directory for on-disk entries (one JSON file per key).
+    max_items : int
+        Max number of entries kept in memory.
+    ttl : float
+        Default time to live of an entry in seconds. `None` - never expire.
+    max_disk_bytes : int
+        Max total size of the cache directory. The oldest files are removed first.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_items: int = 128,
+        ttl: Optional[float] = 24 * 3600,
+        max_disk_bytes: int = 100 * 2**20,
+    ):
+        self.directory = directory
+        self.max_items = max_items
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        self._disk_bytes: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    # Extension of entry files, other files of the directory are not a part of the cache
+    SUFFIX = ".json"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + self.SUFFIX)
+
+    def _read_entry(self, path: str) -> Dict:
+        """Read `{"key", "expires", "data"}` from an entry file. Raise ValueError if it is broken."""
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_entry(self, path: str, entry: Dict) -> int:
+        """Write an entry to a new file and return its size."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(",", ":"))
+            return f.tell()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, key: str, value: Any, expires: Optional[float]):
+        with self._lock:
+            self._memory[key] = (expires, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            entry = self._read_entry(path)
+        except (FileNotFoundError, ValueError):
+            self._count("misses")
+            return None
+
+        expires = entry.get("expires")
+        if entry.get("key") != key or (expires is not None and expires <= now):
+            self._count("expired")
+            self._count("misses")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        self._count("disk_hits")
+        self._remember(key, entry["data"], expires)
+        return entry["data"]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl is not None else None
+        self._remember(key, value, expires)
+
+        path = self._path(key)
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        new_size = self._write_entry(tmp_path, {"key": key, "expires": expires, "data": value})
+        os.replace(tmp_path, path)
+
+        # The directory is scanned only when the running size estimate goes over the limit
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += new_size - old_size
+            over_limit = self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(self.SUFFIX):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        if total > self.max_disk_bytes:
+            for _, size, path in sorted(files):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._count("evictions")
+                total -= size
+                if total <= self.max_disk_bytes:
+                    break
+
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_ratio"] = hits / total if total else 0.0
+        return stats
+
+
+class EncodedResponse:
+    """JSON response body serialized once and kept compressed, ready to be sent as is.
+
+    The body is stored gzip encoded (and brotli encoded if the `brotli` package is installed),
+    clients without compression support get it decompressed. `etag` is the hash of the JSON.
+    """
+
+    def __init__(self, etag: str, gzip_body: bytes, br_body: Optional[bytes] = None):
+        self.etag = etag
+        self.gzip_body = gzip_body
+        self.br_body = br_body
+
+    @classmethod
+    def from_data(cls, data: Any) -> "EncodedResponse":
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        # mtime=0: the same data is always encoded to the same bytes
+        gzip_body = gzip.compress(body, compresslevel=6, mtime=0)
+        return cls(etag, gzip_body, brotli.compress(body, quality=5) if brotli is not None else None)
+
+    @property
+    def encodings(self) -> tuple:
+        return ("br", "gzip") if self.br_body is not None else ("gzip",)
+
+    def body(self, encoding: Optional[str] = None) -> bytes:
+        """Body in `encoding` ("br", "gzip"), the plain JSON by default."""
+        if encoding == "br" and self.br_body is not None:
+            return self.br_body
+        if encoding == "gzip":
+            return self.gzip_body
+        return gzip.decompress(self.gzip_body)
+
+    def data(self) -> Any:
+        return json.loads(self.body())
+
+
+class ResponseCache(ResultCache):
+    """Result cache which keeps `EncodedResponse` bodies: hits are sent without parsing and serializing JSON.
+
+    An entry file is a JSON header line `{"key", "expires", "etag", "gzip", "br"}` (sizes of the bodies)
+    followed by the gzip and brotli bodies.
+    """
+
+    SUFFIX = ".response"
+
+    def _read_entry(self, path: str) -> Dict:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            if not isinstance(header, dict) or not {"key", "etag", "gzip"} <= header.keys():
+                raise ValueError(f"Broken cache entry {path}")
+            gzip_body = f.read(header["gzip"])
+            br_body = f.read(header["br"]) if header.get("br") else None
+        if len(gzip_body) != header["gzip"] or (br_body is not None and len(br_body) != header["br"]):
+            raise ValueError(f"Truncated cache entry {path}")
+        return {**header, "data": EncodedResponse(header["etag"], gzip_body, br_body)}
+
+    def _write_entry(self, path: str, entry: Dict) -> int:
+        response: EncodedResponse = entry["data"]
+        header = {
+            "key": entry["key"],
+            "expires": entry["expires"],
+            "etag": response.etag,
+            "gzip": len(response.gzip_body),
+            "br": len(response.br_body) if response.br_body is not None else 0,
+        }
+        with open(path, "wb") as f:
+            f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.write(response.gzip_body)
+            if response.br_body is not None:
+                f.write(response.br_body)
+            return f.tell()
+
+
+class VacancyCache(ResultCache):
+    """Store of raw vacancy details (`/vacancies/{id}` responses) addressed by vacancy id.
+
+    Shared by different search queries, so overlapping queries download only
+    the vacancies which are not cached yet.
+    """
+
+    def _path(self, key: str) -> str:
+        key = str(key)
+        if key.isdigit():
+            return os.path.join(self.directory, f"{key}{self.SUFFIX}")
+        return super()._path(key)
+
+    def get(self, key) -> Optional[Dict]:
+        return super().get(str(key))
+
+    def set(self, key, value: Dict, ttl: Optional[float] = None):
+        super().set(str(key), value, ttl)
+
+
+VACANCY_CACHE_DIR = os.path.join(CACHE_DIR, "vacancies")
+
+_vacancy_cache: Optional[VacancyCache] = None
+_vacancy_cache_lock = threading.Lock()
+
+
+def get_vacancy_cache() -> VacancyCache:
+    """Process-wide vacancy cache. Configured with VACANCY_CACHE_DIR / VACANCY_CACHE_TTL / VACANCY_CACHE_MAX_BYTES."""
+    global _vacancy_cache
+    if _vacancy_cache is None:
+        with _vacancy_cache_lock:
+            if _vacancy_cache is None:
+                _vacancy_cache = VacancyCache(
+                    os.environ.get("VACANCY_CACHE_DIR", VACANCY_CACHE_DIR),
+                    max_items=int(os.environ.get("VACANCY_CACHE_MAX_ITEMS", 2048)),
+                    ttl=float(os.environ.get("VACANCY_CACHE_TTL", 24 * 3600)),
+                    max_disk_bytes=int(os.environ.get("VACANCY_CACHE_MAX_BYTES", 512 * 2**20)),
+                )
+    return _vacancy_cache
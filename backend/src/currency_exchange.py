@@ -26,53 +26,223 @@ OR CORRECTION.
 ------------------------------------------------------------------------
 """
 import json
-from typing import Dict
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, Optional, Tuple
 
 import requests
 
+from src.cache import CACHE_DIR
+from src.http_client import HttpClient, get_client
+
 
 class Exchanger:
+    """Exchange rates with in-memory and on-disk cache.
+
+    Every successful fetch is stored as a snapshot `<rates_dir>/<YYYY-MM-DD>.json`. Salaries are
+    converted with the newest snapshot: today's one or the last good one when the remote server
+    is not available.
+
+    Parameters
+    ----------
+    config_path : str
+        Path to JSON config with "rates" section.
+    client : HttpClient
+        Pooled HTTP client.
+    rates_dir : str
+        Directory with rates snapshots. Default is `rates` in the cache directory.
+    ttl : float
+        Snapshot age (seconds) after which rates are fetched again.
+    timeout : float
+        Timeout of the request to the exchange rate server.
+    retry_interval : float
+        Min interval (seconds) between two background refresh attempts.
+    """
+
     __EXCHANGE_URL = "https://api.exchangerate-api.com/v4/latest/RUB"
 
-    def __init__(self, config_path: str):
+    def __init__(
+        self,
+        config_path: str,
+        client: Optional[HttpClient] = None,
+        rates_dir: Optional[str] = None,
+        ttl: float = 24 * 3600,
+        timeout: float = 5,
+        retry_interval: float = 300,
+    ):
         self.config_path = config_path
+        self._client = client or get_client()
+        self.rates_dir = rates_dir or os.path.join(CACHE_DIR, "rates")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._snapshots: Dict[str, Dict] = {}
+        # Memoized `latest_rates` lookup: (day, rates)
+        self._latest: Optional[Tuple[str, Optional[Dict]]] = None
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._last_attempt = float("-inf")
+
+    @staticmethod
+    def __day() -> str:
+        return date.today().isoformat()
+
+    def __snapshot_path(self, day: str) -> str:
+        return os.path.join(self.rates_dir, f"{day}.json")
+
+    def _load_snapshot(self, day: str) -> Optional[Dict]:
+        with self._lock:
+            snapshot = self._snapshots.get(day)
+        if snapshot is not None:
+            return snapshot
+        try:
+            with open(self.__snapshot_path(day), "r") as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        with self._lock:
+            self._snapshots[day] = snapshot
+            # The snapshot may be saved by another process: the newest rates are looked up again
+            self._latest = None
+        return snapshot
+
+    def _save_snapshot(self, day: str, rates: Dict):
+        snapshot = {"fetched": time.time(), "rates": rates}
+        os.makedirs(self.rates_dir, exist_ok=True)
+        path = self.__snapshot_path(day)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._snapshots[day] = snapshot
+            self._latest = None
+
+    def _fetch(self) -> Dict:
+        """Get all rates from the remote server. 'RUB' is renamed to 'RUR' (hh.ru currency code)."""
+        response = self._client.get(self.__EXCHANGE_URL, timeout=self.timeout)
+        response.raise_for_status()
+        rates = dict(response.json()["rates"])
+        rates["RUR"] = rates.pop("RUB", 1)
+        return rates
+
+    def snapshot_days(self):
+        if not os.path.isdir(self.rates_dir):
+            return []
+        return sorted(name[: -len(".json")] for name in os.listdir(self.rates_dir) if name.endswith(".json"))
+
+    def latest_rates(self) -> Optional[Dict]:
+        """Rates of the newest snapshot taken today or before, `None` if there are no snapshots.
+
+        The lookup (including a miss) is memoized until the day changes or a new snapshot is loaded,
+        so the snapshot directory is not listed on every call.
+        """
+        day = self.__day()
+        with self._lock:
+            latest = self._latest
+        if latest is not None and latest[0] == day:
+            return latest[1]
+
+        snapshot = self._load_snapshot(day)
+        if snapshot is None:
+            for snapshot_day in reversed(self.snapshot_days()):
+                if snapshot_day <= day:
+                    snapshot = self._load_snapshot(snapshot_day)
+                    if snapshot is not None:
+                        break
+        rates = snapshot["rates"] if snapshot is not None else None
+        with self._lock:
+            self._latest = (day, rates)
+        return rates
+
+    def is_fresh(self) -> bool:
+        snapshot = self._load_snapshot(self.__day())
+        return snapshot is not None and time.time() - snapshot["fetched"] < self.ttl
+
+    def refresh(self) -> Optional[Dict]:
+        """Fetch rates and store today's snapshot. Return `None` if the server is not available."""
+        try:
+            rates = self._fetch()
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            print(f"[WARNING]: Cannot get exchange rates: {str(e)}")
+            return None
+        self._save_snapshot(self.__day(), rates)
+        return rates
 
-    def update_exchange_rates(self, rates: Dict):
-        """Parse exchange rates for RUB, USD, EUR and save them to `rates`
+    def refresh_async(self) -> Optional[threading.Thread]:
+        """Refresh stale rates in a background thread, so startup does not wait for the server.
+
+        At most one refresh runs at a time and failed attempts are repeated after `retry_interval`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            running = self._refresh_thread is not None and self._refresh_thread.is_alive()
+            if running or now - self._last_attempt < self.retry_interval:
+                return None
+            self._last_attempt = now
+        if self.is_fresh():
+            return None
+        thread = threading.Thread(target=self.refresh, name="exchange-rates", daemon=True)
+        with self._lock:
+            self._refresh_thread = thread
+        thread.start()
+        return thread
+
+    def update_exchange_rates(self, rates: Dict, block: bool = True, force: bool = False):
+        """Update exchange rates for the currencies of `rates` in place.
+
+        Cached rates of today are used while they are fresh. Otherwise rates are fetched
+        (if `block`) and the last good snapshot is used when the server is not available.
 
         Parameters
         ----------
         rates : dict
-            Dict of currencies. For example: {"RUB": 1, "USD": 0.001}
+            Dict of currencies. For example: {"RUR": 1, "USD": 0.001}
+        block : bool
+            Wait for the remote server if cached rates are stale. Otherwise refresh them
+            in background and use cached rates right away.
+        force : bool
+            Fetch rates from the remote server and wait for them even if cached rates are fresh.
         """
-
-        try:
-            response = requests.get(self.__EXCHANGE_URL)
-            new_rates = response.json()["rates"]
-        except requests.exceptions.SSLError:
-            raise AssertionError("[FAIL] Cannot get exchange rate! Try later or change the host API")
-
-        for curr in rates:
-            rates[curr] = new_rates[curr]
-
-        # Change 'RUB' to 'RUR'
-        rates["RUR"] = rates.pop("RUB")
+        if force:
+            self.refresh()
+        elif not self.is_fresh():
+            if block:
+                self.refresh()
+            else:
+                self.refresh_async()
+
+        new_rates = self.latest_rates()
+        if new_rates is None:
+            if not any(rates.values()):
+                raise AssertionError("[FAIL] Cannot get exchange rate! Try later or change the host API")
+            print("[WARNING]: No cached exchange rates, keep rates from config")
+            return
+
+        for curr in list(rates):
+            key = "RUR" if curr == "RUB" else curr
+            if new_rates.get(key) is not None:
+                rates[curr] = new_rates[key]
 
     def save_rates(self, rates: Dict):
-        """Save rates to JSON config."""
+        """Save rates to JSON config (the file is replaced atomically)."""
 
         with open(self.config_path, "r") as cfg:
             data = json.load(cfg)
 
         data["rates"] = rates
 
-        with open(self.config_path, "w") as cfg:
+        tmp_path = f"{self.config_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as cfg:
             json.dump(data, cfg, indent=2)
+        os.replace(tmp_path, self.config_path)
 
 
 if __name__ == "__main__":
     _exchanger = Exchanger("../settings.json")
-    _default = {"RUB": None, "USD": None, "EUR": None, "UAH": None}
+    _default = {"RUR": None, "USD": None, "EUR": None, "UAH": None}
     _exchanger.update_exchange_rates(_default)
     _exchanger.save_rates(_default)
     for _k, _v in _default.items():
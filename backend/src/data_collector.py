@@ -1,21 +1,32 @@
 import hashlib
+import json
 import os
-import pickle
-import re
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Optional
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Optional, Union
 from urllib.parse import urlencode
 
 import requests
 from tqdm import tqdm
 
+from src.cache import VacancyCache, get_vacancy_cache
+from src.fetcher import ConcurrentFetcher, RateLimiter
+from src.http_client import HH_API_URL, HttpClient, get_client
+from src.paginator import VacancyPaginator
+from src.salary import SalaryNormalizer
+from src.singleflight import SingleFlight
+from src.text import html_to_text
+from src.vacancy_index import VacancyIndex, get_vacancy_index
+from src.vacancy_store import VacancyTable
+
 CACHE_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), "cache")
 
 # Configure proxy settings
 PROXIES = None  # Disable proxy since Tor is not running
 
+
 class DataCollector:
-    __API_BASE_URL = "https://api.hh.ru/vacancies/"
+    __API_BASE_URL = f"{HH_API_URL}/vacancies/"
     __DICT_KEYS = (
         "id",
         "name",
@@ -29,13 +40,27 @@ class DataCollector:
         "description",
     )
 
-    def __init__(self, exchange_rates: Optional[Dict]):
+    def __init__(
+        self,
+        exchange_rates: Optional[Dict],
+        client: Optional[HttpClient] = None,
+        limiter: Optional[RateLimiter] = None,
+        vacancy_cache: Optional[VacancyCache] = None,
+        vacancy_index: Optional[VacancyIndex] = None,
+    ):
         self._rates = exchange_rates
+        self._normalizer = SalaryNormalizer(exchange_rates)
+        self._client = client or get_client()
+        self._limiter = limiter
+        self._vacancy_cache = vacancy_cache or get_vacancy_cache()
+        # An empty index is falsy (`__len__`): compare with None
+        self._vacancy_index = vacancy_index if vacancy_index is not None else get_vacancy_index()
+        # Queries of a batch run share vacancies: one of them is downloaded once at a time
+        self._flight = SingleFlight()
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/json',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Connection': 'keep-alive'
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            "Accept": "application/json",
+            "Accept-Language": "en-US,en;q=0.9",
         }
 
     @staticmethod
@@ -50,71 +75,96 @@ class DataCollector:
         Returns
         -------
         result: string
-            Clean text without HTML tags
+            Clean text without HTML tags and entities
 
         """
-        pattern = re.compile("<.*?>")
-        return re.sub(pattern, "", html_text)
+        return html_to_text(html_text)
 
-    @staticmethod
-    def __convert_gross(is_gross: bool) -> float:
-        return 0.87 if is_gross else 1
+    def __load_vacancy(self, vacancy_id: str, use_cache: bool) -> Optional[Dict]:
+        # Get data from the shared vacancy cache or from URL
+        vacancy = self._vacancy_cache.get(vacancy_id) if use_cache else None
+        if vacancy is None:
+            url = f"{self.__API_BASE_URL}{vacancy_id}"
+            # Only requests to the API are rate limited, cache hits are not
+            if self._limiter is not None:
+                self._limiter.acquire()
+            try:
+                response = self._client.get(url, headers=self.headers)
+                response.raise_for_status()
+                vacancy = response.json()
+            except requests.exceptions.RequestException as e:
+                print(f"[ERROR] Failed to get vacancy {vacancy_id}: {str(e)}")
+                return None
+            self._vacancy_cache.set(vacancy_id, vacancy)
+        return vacancy
 
-    def get_vacancy(self, vacancy_id: str):
-        # Get data from URL
-        url = f"{self.__API_BASE_URL}{vacancy_id}"
-        try:
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            vacancy = response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to get vacancy {vacancy_id}: {str(e)}")
+    def get_vacancy(self, vacancy_id: str, use_cache: bool = True):
+        vacancy = self._flight.do(vacancy_id, lambda: self.__load_vacancy(vacancy_id, use_cache))
+        if vacancy is None:
             return None
 
-        # Extract salary
-        salary = vacancy.get("salary")
-
-        # Calculate salary:
-        # Get salary into {RUB, USD, EUR} with {Gross} parameter and
-        # return a new salary in RUB.
-        from_to = {"from": None, "to": None}
-        if salary:
-            is_gross = vacancy["salary"].get("gross")
-            currency = salary.get("currency", "RUR")
-            
-            # Если валюта не поддерживается, используем RUR как базовую
-            if currency not in self._rates:
-                print(f"[WARNING] Unsupported currency {currency} for vacancy {vacancy_id}, using RUR")
-                currency = "RUR"
-            
-            for k, v in from_to.items():
-                if vacancy["salary"][k] is not None:
-                    _value = self.__convert_gross(is_gross)
-                    from_to[k] = int(_value * salary[k] / self._rates[currency])
+        # Salary is kept raw here and converted to RUR for all vacancies at once in `collect_vacancies`
+        salary = vacancy.get("salary") or {}
 
         # Create formatted vacancy data
         formatted_vacancy = {
-            'id': vacancy_id,
-            'name': vacancy.get("name", ""),  # Название вакансии
-            'employer': vacancy.get("employer", {}).get("name", ""),  # Название компании
-            'salary_from': from_to["from"],
-            'salary_to': from_to["to"],
-            'experience': vacancy.get("experience", {}).get("name", ""),
-            'key_skills': [skill.get("name") for skill in vacancy.get("key_skills", [])]
+            "id": vacancy_id,
+            "name": vacancy.get("name", ""),  # Название вакансии
+            "employer": vacancy.get("employer", {}).get("name", ""),  # Название компании
+            "salary_from": salary.get("from"),
+            "salary_to": salary.get("to"),
+            "salary_currency": salary.get("currency"),
+            "salary_gross": salary.get("gross"),
+            "has_salary": salary.get("from") is not None or salary.get("to") is not None,
+            "experience": vacancy.get("experience", {}).get("name", ""),
+            "schedule": (vacancy.get("schedule") or {}).get("name"),
+            "area": (vacancy.get("area") or {}).get("id"),
+            "key_skills": [skill.get("name") for skill in vacancy.get("key_skills", [])],
+            # Description is cleaned once here, analyzer and predictor use the plain text
+            "description": self.clean_tags(vacancy.get("description") or ""),
         }
-        
-        print(f"[DEBUG] Formatted vacancy: {formatted_vacancy}")
+
+        print(f"[DEBUG] Formatted vacancy: {vacancy_id} {formatted_vacancy['name']}")
         return formatted_vacancy
 
     @staticmethod
     def __encode_query_for_url(query: Optional[Dict]) -> str:
-        if 'professional_roles' in query:
+        if "professional_roles" in query:
             query_copy = query.copy()
-            roles = '&'.join([f'professional_role={r}' for r in query_copy.pop('professional_roles')])
-            return roles + (f'&{urlencode(query_copy)}' if len(query_copy) > 0 else '')
+            roles = "&".join([f"professional_role={r}" for r in query_copy.pop("professional_roles")])
+            return roles + (f"&{urlencode(query_copy)}" if len(query_copy) > 0 else "")
         return urlencode(query)
 
-    def collect_vacancies(self, query: Optional[Dict], refresh: bool = False, num_workers: int = 1) -> Dict:
+    @staticmethod
+    def __query_params(query: Optional[Dict]) -> Dict:
+        params = dict(query or {})
+        if "professional_roles" in params:
+            params["professional_role"] = params.pop("professional_roles")
+        return params
+
+    @staticmethod
+    def __load_index(path: str) -> Dict[str, Dict]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def __save_index(path: str, index: Dict[str, Dict]):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, path)
+
+    def collect_vacancies(
+        self,
+        query: Optional[Dict],
+        refresh: bool = False,
+        num_workers: int = 1,
+        limit: Optional[int] = None,
+        incremental: bool = False,
+    ) -> Union[VacancyTable, Dict]:
         """Parse vacancy JSON: get vacancy name, salary, experience etc.
 
         Parameters
@@ -125,11 +175,17 @@ class DataCollector:
             Refresh cached data
         num_workers :  int
             Number of workers for threading.
+        limit : int
+            Max number of vacancies to collect. All pages of the listing are read by default.
+        incremental : bool
+            Read the listing again but fetch only new or updated vacancies, other rows are taken
+            from the cached table. Vacancies which are not listed anymore are removed from the table
+            and marked with `removed_at` in the query index.
 
         Returns
         -------
-        dict
-            Dict of useful arguments from vacancies
+        VacancyTable
+            Columnar table of useful arguments from vacancies (empty dict if nothing was found)
 
         """
         if num_workers is None or num_workers < 1:
@@ -140,44 +196,115 @@ class DataCollector:
         # Get cached data if exists...
         cache_name: str = url_params
         cache_hash = hashlib.md5(cache_name.encode()).hexdigest()
-        cache_file = os.path.join(CACHE_DIR, cache_hash)
-        try:
-            if not refresh:
-                print(f"[INFO]: Get results from cache! Enable refresh option to update results.")
-                return pickle.load(open(cache_file, "rb"))
-        except (FileNotFoundError, pickle.UnpicklingError):
-            pass
-
-        # Check number of pages...
-        target_url = self.__API_BASE_URL + "?" + url_params
+        cache_path = os.path.join(CACHE_DIR, f"{cache_hash}.vacancies")
+        # Index of listed vacancies: {id: {"published_at", "updated_at", "removed_at"}}
+        index_path = os.path.join(CACHE_DIR, f"{cache_hash}.index.json")
+        cached = VacancyTable.exists(cache_path)
+        if not refresh and not incremental and cached:
+            print(f"[INFO]: Get results from cache! Enable refresh option to update results.")
+            return VacancyTable.load(cache_path)
+
+        index = self.__load_index(index_path)
+        table = VacancyTable.load(cache_path) if incremental and cached else None
+        known = set(table.ids()) if table is not None else set()
+        listed: Dict[str, Dict] = {}
+        updated = set()
+        unchanged = set()
+
+        def iter_ids_to_fetch(items):
+            # Compare listing items with the index and skip vacancies which have not changed
+            for item in items:
+                vacancy_id = str(item["id"])
+                stamp = {"published_at": item.get("published_at"), "updated_at": item.get("updated_at")}
+                listed[vacancy_id] = stamp
+                entry = index.get(vacancy_id) or {}
+                if vacancy_id in known:
+                    if not entry.get("removed_at") and all(entry.get(k) == v for k, v in stamp.items()):
+                        unchanged.add(vacancy_id)
+                        continue
+                    updated.add(vacancy_id)
+                yield vacancy_id
+
+        def fetch(vacancy_id):
+            # Updated vacancies must not be taken from the shared vacancy cache
+            return self.get_vacancy(vacancy_id, use_cache=vacancy_id not in updated)
+
+        # Read all pages of the listing and fetch vacancies while pages are still arriving...
+        paginator = VacancyPaginator(
+            self.__API_BASE_URL.rstrip("/"),
+            client=self._client,
+            limiter=self._limiter,
+            max_workers=num_workers,
+            headers=self.headers,
+        )
+        items = paginator.iter_items(self.__query_params(query), limit=limit)
+
+        vacancies = {}
+        fetcher = ConcurrentFetcher(max_workers=num_workers)
         try:
-            response = requests.get(target_url, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            pages = response.json()
-            print(f"[DEBUG] API Response: {pages.keys()}")
+            with tqdm(total=None if table is not None else limit) as pbar:
+                for vacancy in fetcher.map(fetch, iter_ids_to_fetch(items)):
+                    if table is None:
+                        pbar.total = min(paginator.found, limit or paginator.found, VacancyPaginator.MAX_DEPTH)
+                    pbar.update()
+                    if vacancy:
+                        vacancies[vacancy["id"]] = vacancy
         except requests.exceptions.RequestException as e:
             print(f"[ERROR] Failed to get pages: {str(e)}")
-            return {}
+            return table if table is not None else {}
 
-        # Get vacancy IDs
-        vacancy_ids = [str(vacancy["id"]) for vacancy in pages.get("items", [])]
-        if not vacancy_ids:
-            print("[WARNING] No vacancies found")
-            return {}
+        # Vacancies can be marked as removed only if the whole listing was read
+        complete = limit is None and paginator.found <= VacancyPaginator.MAX_DEPTH and not paginator.skipped_pages
 
-        # Get vacancies data
-        vacancies = {}
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            for vacancy in tqdm(executor.map(self.get_vacancy, vacancy_ids), total=len(vacancy_ids)):
-                if vacancy:
-                    vacancies[vacancy['id']] = vacancy
+        # Convert salaries of all new vacancies to RUR in one vectorized pass
+        records = self._normalizer.normalize_records(list(vacancies.values()))
+        unknown = sorted({rec["original_currency"] for rec in records if rec["unknown_currency"]})
+        if unknown:
+            print(f"[WARNING] Unsupported currencies {unknown}: salaries are not converted and flagged")
+
+        removed = set()
+        if table is not None:
+            # Cached rows are already normalized: keep unchanged ones and ones which failed to update
+            kept = []
+            for record in table.to_records():
+                if record["id"] in vacancies:
+                    continue
+                if complete and record["id"] not in listed:
+                    removed.add(record["id"])
+                    continue
+                kept.append(record)
+            print(
+                f"[INFO]: Incremental update: {len(vacancies) - len(updated & set(vacancies))} new, "
+                f"{len(updated & set(vacancies))} updated, {len(removed)} removed, {len(kept)} unchanged"
+            )
+            records = kept + records
 
-        # Save to cache
-        os.makedirs(CACHE_DIR, exist_ok=True)
-        with open(cache_file, "wb") as f:
-            pickle.dump(vacancies, f)
+        # Update the query index: listed vacancies are alive, the missing ones are tombstoned.
+        # Vacancies which failed to download keep their old entry, so the next run fetches them again
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        for vacancy_id, stamp in listed.items():
+            if vacancy_id in vacancies or vacancy_id in unchanged:
+                index[vacancy_id] = {**stamp, "removed_at": None}
+        if complete:
+            for vacancy_id, entry in index.items():
+                if vacancy_id not in listed and not entry.get("removed_at"):
+                    entry["removed_at"] = now
+
+        # New vacancies become searchable locally (`/api/search?mode=local`), closed ones are removed
+        try:
+            self._vacancy_index.upsert(vacancies.values())
+            self._vacancy_index.delete(removed)
+        except sqlite3.Error as e:
+            print(f"[WARNING] Failed to update the vacancy index: {str(e)}")
+
+        if not records:
+            print("[WARNING] No vacancies found")
+            return {}
 
-        return vacancies
+        # Save to cache as a columnar table and return it memory-mapped
+        VacancyTable.from_records(records).save(cache_path)
+        self.__save_index(index_path, index)
+        return VacancyTable.load(cache_path)
 
 
 if __name__ == "__main__":
@@ -187,4 +314,4 @@ if __name__ == "__main__":
         query={"text": "FPGA", "area": 1, "per_page": 50},
         # refresh=True
     )
-    print(vacancies["Employer"])
+    print(vacancies.to_dataframe()["employer"].value_counts())
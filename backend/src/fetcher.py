@@ -0,0 +1,106 @@
+"""Bounded-concurrency fetch engine with a shared token-bucket rate limiter."""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Thread-safe token bucket.
+
+    Parameters
+    ----------
+    rate : float
+        Number of tokens added per second (i.e. requests per second).
+    capacity : float
+        Maximum bucket size (burst). Defaults to `rate`.
+    on_wait : callable
+        Optional `on_wait(seconds)` called after every `acquire` with the time spent waiting.
+    """
+
+    def __init__(
+        self, rate: float, capacity: Optional[float] = None, on_wait: Optional[Callable[[float], None]] = None
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.on_wait = on_wait
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available and take them. Return the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    break
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+        if self.on_wait is not None:
+            self.on_wait(waited)
+        return waited
+
+
+class ConcurrentFetcher:
+    """Run a blocking function over a stream of items in a thread pool.
+
+    Results are yielded in input order. An exception raised for one item is logged
+    and yields `None` for that item, so the other items are not affected.
+
+    Parameters
+    ----------
+    max_workers : int
+        Number of worker threads.
+    limiter : RateLimiter
+        Optional limiter shared between fetchers. Every call takes one token, so it fits only
+        functions which always make a request; functions which check a cache first should take
+        a token themselves right before the request.
+    """
+
+    def __init__(self, max_workers: int = 8, limiter: Optional[RateLimiter] = None):
+        self.max_workers = max(1, int(max_workers))
+        self.limiter = limiter
+
+    def _call(self, func: Callable, item):
+        if self.limiter is not None:
+            self.limiter.acquire()
+        try:
+            return func(item)
+        except Exception as e:
+            logger.error(f"Error fetching {item}: {str(e)}")
+            return None
+
+    def map_pairs(self, func: Callable, items: Iterable) -> Iterator[Tuple]:
+        """Lazily apply `func` to `items` and yield `(item, result)` pairs.
+
+        `items` may be a generator (e.g. a paginated listing): it is consumed only as fast as
+        the workers progress, keeping at most `2 * max_workers` calls in flight.
+        """
+        window = 2 * self.max_workers
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for item in items:
+                pending.append((item, executor.submit(self._call, func, item)))
+                if len(pending) >= window:
+                    item, future = pending.popleft()
+                    yield item, future.result()
+            while pending:
+                item, future = pending.popleft()
+                yield item, future.result()
+
+    def map(self, func: Callable, items: Iterable) -> Iterator:
+        """Same as `map_pairs`, but yield only the results."""
+        for _, result in self.map_pairs(func, items):
+            yield result
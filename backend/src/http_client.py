@@ -0,0 +1,129 @@
+"""Shared HTTP client: pooled keep-alive sessions per host with timeouts and retries."""
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# hh.ru API root. Can be pointed to a local stub server (see `benchmarks/hh_stub.py`) with HH_API_URL
+HH_API_URL = os.environ.get("HH_API_URL", "https://api.hh.ru").rstrip("/")
+
+
+class HttpClient:
+    """Keep one `requests.Session` per host so TCP/TLS connections are reused.
+
+    Parameters
+    ----------
+    pool_size : int
+        Max number of kept-alive connections per host.
+    timeout : float
+        Default timeout (seconds) for every request.
+    retries : int
+        Number of retries on connection errors and `RETRY_STATUSES`.
+    backoff_factor : float
+        Exponential backoff factor between retries (`Retry-After` is respected).
+    headers : dict
+        Default headers for all sessions.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: float = 30,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        headers: Optional[Dict] = None,
+        retry_statuses: Iterable[int] = RETRY_STATUSES,
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.headers = headers or {}
+        self.retry_statuses = tuple(retry_statuses)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+        self._observers: List[Callable[[str, float, str], None]] = []
+
+    def _make_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.retry_statuses,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def session(self, url: str) -> requests.Session:
+        """Return the pooled session for the host of `url`."""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._sessions[host] = self._make_session()
+        return session
+
+    def add_observer(self, observer: Callable[[str, float, str], None]):
+        """Call `observer(url, seconds, outcome)` after every request (e.g. to collect metrics).
+
+        `outcome` is the HTTP status code or the exception class name. Retries are a part of one request.
+        """
+        self._observers.append(observer)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        if not self._observers:
+            return self.session(url).get(url, **kwargs)
+
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = self.session(url).get(url, **kwargs)
+            outcome = str(response.status_code)
+            return response
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            for observer in self._observers:
+                observer(url, elapsed, outcome)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Process-wide client. Pool size and timeout can be set with HTTP_POOL_SIZE / HTTP_TIMEOUT."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(
+                    pool_size=int(os.environ.get("HTTP_POOL_SIZE", 10)),
+                    timeout=float(os.environ.get("HTTP_TIMEOUT", 30)),
+                    retries=int(os.environ.get("HTTP_RETRIES", 3)),
+                )
+    return _client
@@ -0,0 +1,220 @@
+"""Background jobs for long-running searches."""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when the number of queued and running jobs reached the limit."""
+
+
+class Job:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, job_id: str, params: Optional[Dict] = None):
+        self.id = job_id
+        self.params = params or {}
+        self.status = self.QUEUED
+        self.fetched = 0
+        self.total: Optional[int] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+    def to_dict(self, with_result: bool = False) -> Dict:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "progress": {"fetched": self.fetched, "total": self.total},
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+        }
+        if with_result:
+            data["result"] = self.result
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Job":
+        job = cls(data["job_id"], data.get("params"))
+        job.status = data["status"]
+        job.fetched = data["progress"]["fetched"]
+        job.total = data["progress"]["total"]
+        job.error = data.get("error")
+        job.result = data.get("result")
+        job.created = data["created"]
+        job.finished = data.get("finished")
+        return job
+
+
+class JobManager:
+    """Run jobs on a background thread pool with a bounded queue.
+
+    The job function gets a `progress(fetched, total)` keyword argument. If `state_dir` is set,
+    job state is also written there so that any gunicorn worker can answer status requests.
+    An unfinished job of another process is reported as failed when that process has exited
+    or its state file was not updated for `ttl` seconds.
+
+    Parameters
+    ----------
+    max_workers : int
+        Number of jobs running at the same time.
+    max_queued : int
+        Max number of jobs waiting for a free worker.
+    state_dir : str
+        Directory for job state files. `None` - keep jobs in memory only.
+    ttl : float
+        Finished jobs are forgotten after `ttl` seconds. Also the max time between two updates
+        of the state file of a running job.
+    progress_interval : float
+        Min interval between two writes of job progress to `state_dir`.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queued: int = 16,
+        state_dir: Optional[str] = None,
+        ttl: float = 3600,
+        progress_interval: float = 0.5,
+    ):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.state_dir = state_dir
+        self.ttl = ttl
+        self.progress_interval = progress_interval
+        self._jobs: Dict[str, Job] = {}
+        self._active = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+
+    def _state_path(self, job_id: str) -> str:
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _persist(self, job: Job):
+        if not self.state_dir:
+            return
+        path = self._state_path(job.id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        # The owner process is stored to detect jobs of workers which have exited
+        state = {**job.to_dict(with_result=job.is_finished), "pid": os.getpid()}
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _is_alive(pid: Optional[int]) -> bool:
+        # Jobs of this process are in memory: a state file with its pid is left by a previous process
+        if pid == os.getpid():
+            return False
+        if not pid or os.name != "posix":
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _purge(self):
+        now = time.time()
+        with self._lock:
+            expired = [k for k, job in self._jobs.items() if job.finished and now - job.finished > self.ttl]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for job_id in expired:
+            if self.state_dir:
+                try:
+                    os.remove(self._state_path(job_id))
+                except OSError:
+                    pass
+
+    def submit(self, func: Callable, params: Optional[Dict] = None) -> Job:
+        """Queue `func(progress=...)`. Raise `JobQueueFull` if too many jobs are pending."""
+        self._purge()
+        with self._lock:
+            if self._active >= self.max_workers + self.max_queued:
+                raise JobQueueFull(f"Too many jobs in queue: {self._active}")
+            self._active += 1
+            job = Job(uuid.uuid4().hex, params)
+            self._jobs[job.id] = job
+        self._persist(job)
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def _run(self, job: Job, func: Callable):
+        last_write = 0.0
+
+        def progress(fetched: int, total: Optional[int] = None):
+            nonlocal last_write
+            job.fetched = fetched
+            if total is not None:
+                job.total = total
+            now = time.monotonic()
+            if now - last_write >= self.progress_interval:
+                last_write = now
+                self._persist(job)
+
+        job.status = Job.RUNNING
+        self._persist(job)
+        try:
+            job.result = func(progress=progress)
+            job.status = Job.DONE
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = Job.FAILED
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._active -= 1
+            self._persist(job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None or not self.state_dir:
+            return job
+        path = self._state_path(os.path.basename(job_id))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            job = Job.from_dict(state)
+            updated = os.path.getmtime(path)
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+        now = time.time()
+        if job.is_finished:
+            if now - job.finished > self.ttl:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                return None
+            return job
+        # The job of another process: it can not finish if that process has exited (or hangs)
+        if not self._is_alive(state.get("pid")) or now - updated > self.ttl:
+            job.status = Job.FAILED
+            job.error = "Job was interrupted: its worker process has exited"
+            job.finished = now
+            self._persist(job)
+        return job
@@ -0,0 +1,310 @@
+"""Counters and latency histograms in the Prometheus text format, aggregated over processes.
+
+Every process (e.g. a gunicorn worker) keeps its metrics in memory and periodically writes them
+to `<directory>/<pid>-<token>.json`, the random token keeps a new worker which reuses the pid of
+a finished one from overwriting its file. A scrape handled by any worker merges the files of all
+workers, so `/metrics` shows totals of the whole server whichever worker answers. Metrics of
+finished workers are folded into `total.json`, so counters never go down; clean the directory
+when the server is redeployed.
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: files of finished workers are kept as they are
+    fcntl = None
+
+# Latency buckets in seconds: from cache hits (ms) to slow hh.ru crawls (tens of seconds)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Metrics of finished processes
+TOTAL_FILE = "total.json"
+
+LabelsKey = Tuple[Tuple[str, str], ...]
+
+logger = logging.getLogger(__name__)
+
+
+def _labels_key(labels: Dict) -> LabelsKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Sequence[Sequence[str]], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid() or os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """Registry of counters and histograms.
+
+    Parameters
+    ----------
+    directory : str
+        Directory shared by all processes of the server. `None` - metrics of this process only.
+    flush_interval : float
+        Min interval (seconds) between writes of this process' metrics to `directory`.
+    buckets : sequence of float
+        Default upper bounds of histogram buckets.
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, flush_interval: float = 1.0, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = tuple(sorted(buckets))
+        # name -> (type, help, buckets)
+        self._meta: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}
+        self._lock = threading.Lock()
+        self._reset()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if hasattr(os, "register_at_fork"):
+            # Forked workers must not report metrics of the parent as their own
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._counters: Dict[str, Dict[LabelsKey, float]] = {}
+        # name -> labels -> [bucket counts..., sum, count]
+        self._histograms: Dict[str, Dict[LabelsKey, List[float]]] = {}
+        self._flushed = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._file_name = f"{os.getpid()}-{uuid.uuid4().hex[:12]}.json"
+
+    def counter(self, name: str, help_text: str = ""):
+        self._meta[name] = ("counter", help_text, ())
+
+    def histogram(self, name: str, help_text: str = "", buckets: Optional[Sequence[float]] = None):
+        self._meta[name] = ("histogram", help_text, tuple(sorted(buckets)) if buckets else self.buckets)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _labels_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+        self._maybe_flush()
+
+    def observe(self, name: str, value: float, **labels):
+        buckets = self._meta.get(name, ("histogram", "", self.buckets))[2] or self.buckets
+        key = _labels_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            values = series.get(key)
+            if values is None:
+                values = series[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    values[i] += 1
+                    break
+            values[-2] += value
+            values[-1] += 1
+        self._maybe_flush()
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the duration of the `with` block in histogram `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels) -> Callable:
+        """Decorator: observe the duration of every call of the function in histogram `name`."""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _snapshot(self) -> Dict:
+        with self._lock:
+            return self._dump(self._counters, self._histograms)
+
+    @staticmethod
+    def _dump(counters: Dict[str, Dict[LabelsKey, float]], histograms: Dict[str, Dict[LabelsKey, List[float]]]) -> Dict:
+        return {
+            "counters": {name: [[list(k), v] for k, v in series.items()] for name, series in counters.items()},
+            "histograms": {
+                name: [[list(k), list(v)] for k, v in series.items()] for name, series in histograms.items()
+            },
+        }
+
+    def _maybe_flush(self):
+        if not self.directory or time.monotonic() - self._flushed < self.flush_interval:
+            return
+        # Called from request code: a busy flush is not waited for and write errors are only logged
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._flush()
+        except OSError as e:
+            logger.warning(f"Failed to write metrics: {str(e)}")
+        finally:
+            self._flush_lock.release()
+
+    def flush(self):
+        """Write metrics of this process to the shared directory."""
+        if not self.directory:
+            return
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        self._flushed = time.monotonic()
+        self._write(self._file_name, self._snapshot())
+
+    def _write(self, file_name: str, snapshot: Dict):
+        path = os.path.join(self.directory, file_name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def _read(self, file_name: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.directory, file_name), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        # Scrapes of different workers read and fold the files one at a time
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, ".lock"), "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _collect(self) -> Tuple[Dict, Dict]:
+        """Counters and histograms summed over all processes."""
+        if not self.directory:
+            return self._merge([self._snapshot()])
+        try:
+            self.flush()
+        except OSError as e:
+            logger.warning(f"Failed to write metrics: {str(e)}")
+
+        with self._directory_lock():
+            total = self._read(TOTAL_FILE) or {"counters": {}, "histograms": {}, "folded": []}
+            folded = set(total.get("folded", []))
+            snapshots, finished = [total], {}
+            for file_name in os.listdir(self.directory):
+                if not file_name.endswith(".json") or file_name == TOTAL_FILE:
+                    continue
+                if file_name in folded:
+                    # Already counted in the total: the fold was interrupted before the file was removed
+                    self._remove(file_name)
+                    continue
+                snapshot = self._read(file_name)
+                if snapshot is None:
+                    continue
+                snapshots.append(snapshot)
+                pid = file_name.split("-", 1)[0].split(".", 1)[0]
+                if pid.isdigit() and not _process_alive(int(pid)):
+                    finished[file_name] = snapshot
+            if finished and fcntl is not None:
+                try:
+                    self._fold(total, finished)
+                except OSError as e:
+                    logger.warning(f"Failed to fold metrics of finished workers: {str(e)}")
+        return self._merge(snapshots)
+
+    def _remove(self, file_name: str):
+        try:
+            os.remove(os.path.join(self.directory, file_name))
+        except OSError:
+            pass
+
+    def _fold(self, total: Dict, finished: Dict[str, Dict]):
+        """Add metrics of finished processes to the total and remove their files."""
+        counters, histograms = self._merge([total, *finished.values()])
+        # Folded files are listed until they are removed, so an interrupted fold does not count them twice
+        folded = [name for name in total.get("folded", []) if os.path.exists(os.path.join(self.directory, name))]
+        self._write(TOTAL_FILE, {**self._dump(counters, histograms), "folded": folded + list(finished)})
+        for file_name in finished:
+            self._remove(file_name)
+
+    @staticmethod
+    def _merge(snapshots: List[Dict]) -> Tuple[Dict, Dict]:
+        counters: Dict[str, Dict[LabelsKey, float]] = {}
+        histograms: Dict[str, Dict[LabelsKey, List[float]]] = {}
+        for snapshot in snapshots:
+            for name, series in snapshot["counters"].items():
+                merged = counters.setdefault(name, {})
+                for labels, value in series:
+                    key = tuple(tuple(pair) for pair in labels)
+                    merged[key] = merged.get(key, 0) + value
+            for name, series in snapshot["histograms"].items():
+                merged = histograms.setdefault(name, {})
+                for labels, values in series:
+                    key = tuple(tuple(pair) for pair in labels)
+                    if key in merged and len(merged[key]) == len(values):
+                        merged[key] = [a + b for a, b in zip(merged[key], values)]
+                    else:
+                        merged[key] = list(values)
+        return counters, histograms
+
+    def render(self) -> str:
+        """Metrics of all processes in the Prometheus text exposition format."""
+        counters, histograms = self._collect()
+        lines = []
+        for name in sorted(set(counters) | set(histograms)):
+            kind, help_text, buckets = self._meta.get(name, ("counter" if name in counters else "histogram", "", ()))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(counters.get(name, {}).items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for labels, values in sorted(histograms.get(name, {}).items()):
+                bounds = (buckets or self.buckets) + (math.inf,)
+                cumulative = 0
+                # Counts are stored per bucket, the exposition format needs cumulative ones
+                for bound, count in zip(bounds, values[:-2] + [values[-1] - sum(values[:-2])]):
+                    cumulative += count
+                    le = ("le", _format_value(bound))
+                    lines.append(f"{name}_bucket{_format_labels(labels, le)} {_format_value(cumulative)}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(values[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {_format_value(values[-1])}")
+        return "\n".join(lines) + "\n"
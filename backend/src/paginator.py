@@ -0,0 +1,99 @@
+"""Paginated hh.ru vacancy listing with concurrent page fetching."""
+import logging
+import math
+from typing import Dict, Iterator, Optional
+
+from src.fetcher import ConcurrentFetcher, RateLimiter
+from src.http_client import HttpClient, get_client
+
+logger = logging.getLogger(__name__)
+
+
+class VacancyPaginator:
+    """Stream listing items of `/vacancies` page by page.
+
+    The first page is requested synchronously to learn `found`/`pages`, the rest are
+    fetched concurrently (within the shared rate limit) and yielded in page order as
+    soon as they arrive, so the detail stage can start before the listing is complete.
+
+    Parameters
+    ----------
+    url : str
+        Listing URL, e.g. "https://api.hh.ru/vacancies".
+    client : HttpClient
+        Pooled HTTP client.
+    limiter : RateLimiter
+        Optional rate limiter shared with the detail requests.
+    max_workers : int
+        Number of pages fetched in parallel.
+    headers : dict
+        Extra request headers.
+    """
+
+    MAX_PER_PAGE = 100
+    # hh.ru returns no more than 2000 vacancies for one query (page * per_page < 2000)
+    MAX_DEPTH = 2000
+
+    def __init__(
+        self,
+        url: str,
+        client: Optional[HttpClient] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_workers: int = 4,
+        headers: Optional[Dict] = None,
+    ):
+        self.url = url
+        self.client = client or get_client()
+        self.limiter = limiter
+        self.max_workers = max_workers
+        self.headers = headers
+        self.found: int = 0
+        self.pages: int = 0
+        # Pages lost on errors in the last `iter_items` call: the listing is incomplete if non zero
+        self.skipped_pages: int = 0
+
+    def _get_page(self, params: Dict) -> Dict:
+        response = self.client.get(self.url, params=params, headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_items(self, params: Dict, limit: Optional[int] = None) -> Iterator[Dict]:
+        """Yield listing items for the query `params` (up to `limit` items, all by default).
+
+        `page` in `params` is ignored, `per_page` is used as the page size (max 100).
+        Errors on the first page are raised, errors on the other pages are logged and skipped.
+        """
+        per_page = min(int(params.get("per_page") or self.MAX_PER_PAGE), self.MAX_PER_PAGE)
+        if limit is not None:
+            per_page = max(1, min(per_page, limit))
+        base = {**params, "per_page": per_page}
+        self.skipped_pages = 0
+
+        if self.limiter is not None:
+            self.limiter.acquire()
+        first = self._get_page({**base, "page": 0})
+        self.found = first.get("found", 0)
+        self.pages = first.get("pages", 1)
+
+        total = min(self.found, self.MAX_DEPTH)
+        if limit is not None:
+            total = min(total, limit)
+        num_pages = min(self.pages, math.ceil(total / per_page))
+
+        left = total
+        for item in first.get("items", [])[:left]:
+            yield item
+        left -= min(left, len(first.get("items", [])))
+
+        fetcher = ConcurrentFetcher(max_workers=self.max_workers, limiter=self.limiter)
+        pages = ({**base, "page": page} for page in range(1, num_pages))
+        for page_params, data in fetcher.map_pairs(self._get_page, pages):
+            if left <= 0:
+                break
+            if data is None:
+                logger.warning(f"Skip page {page_params['page']} of {self.url}")
+                self.skipped_pages += 1
+                continue
+            items = data.get("items", [])[:left]
+            left -= len(items)
+            yield from items
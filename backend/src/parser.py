@@ -1,18 +1,30 @@
 import argparse
 import json
-from typing import Dict, Optional, Sequence
+from typing import Dict, List, Optional, Sequence, Union
 
 
 class Settings:
     def __init__(
-        self, config_path: str, input_args: Optional[Sequence[str]] = None, no_parse: bool = False,
+        self,
+        config_path: str,
+        input_args: Optional[Sequence[str]] = None,
+        no_parse: bool = False,
     ):
         self.options: Optional[Dict] = None
         self.rates: Optional[Dict] = None
         self.refresh: bool = False
+        self.incremental: bool = False
+        self.train: bool = False
         self.num_workers: int = 1
+        # Processes for the analysis of collected vacancies
+        self.analysis_workers: int = 1
         self.save_result: bool = False
         self.update: bool = False
+        # Batch mode: list of query texts or option dicts (merged over `options`)
+        self.queries: List[Union[str, Dict]] = []
+        self.query_workers: int = 2
+        # Requests per second to hh.ru API shared by all workers and queries (0 - no limit)
+        self.rate_limit: float = 8
 
         with open(config_path, "r") as cfg:
             config: Dict = json.load(cfg)
@@ -49,24 +61,94 @@ class Settings:
     def __parse_args(inputs_args) -> Dict:
         parser = argparse.ArgumentParser(description="HeadHunter vacancies researcher")
         parser.add_argument(
-            "-t", "--text", action="store", type=str, default=None, help='Search query text (e.g. "Machine learning")',
+            "-t",
+            "--text",
+            action="store",
+            type=str,
+            default=None,
+            help='Search query text (e.g. "Machine learning")',
         )
         parser.add_argument(
-            "-p", "--professional_roles", action="store", type=int, default=None,
-            help='Professional role filter (Possible roles can be found here https://api.hh.ru/professional_roles)',
-            nargs='*'
+            "-p",
+            "--professional_roles",
+            action="store",
+            type=int,
+            default=None,
+            help="Professional role filter (Possible roles can be found here https://api.hh.ru/professional_roles)",
+            nargs="*",
         )
         parser.add_argument(
-            "-n", "--num_workers", action="store", type=int, default=None, help="Number of workers for multithreading.",
+            "-q",
+            "--queries",
+            action="store",
+            type=str,
+            default=None,
+            nargs="*",
+            help='Run several search queries in one batch (e.g. -q "Python developer" "Data Scientist")',
         )
         parser.add_argument(
-            "-r", "--refresh", help="Refresh cached data from HH API", action="store_true", default=None,
+            "--query_workers",
+            action="store",
+            type=int,
+            default=None,
+            help="Number of queries processed in parallel.",
         )
         parser.add_argument(
-            "-s", "--save_result", help="Save parsed result as DataFrame to CSV file.", action="store_true", default=None,
+            "-n",
+            "--num_workers",
+            action="store",
+            type=int,
+            default=None,
+            help="Number of workers for multithreading.",
         )
         parser.add_argument(
-            "-u", "--update", action="store_true", default=None, help="Save command line args to file in JSON format.",
+            "--rate_limit",
+            "--rate-limit",
+            action="store",
+            type=float,
+            default=None,
+            help="Max requests per second to hh.ru API for all workers and queries (0 - no limit).",
+        )
+        parser.add_argument(
+            "--analysis_workers",
+            action="store",
+            type=int,
+            default=None,
+            help="Number of processes for the analysis of large vacancy corpora.",
+        )
+        parser.add_argument(
+            "-r",
+            "--refresh",
+            help="Refresh cached data from HH API",
+            action="store_true",
+            default=None,
+        )
+        parser.add_argument(
+            "-i",
+            "--incremental",
+            action="store_true",
+            default=None,
+            help="Fetch only new or updated vacancies and drop removed ones from cached data",
+        )
+        parser.add_argument(
+            "--train",
+            action="store_true",
+            default=None,
+            help="Train salary prediction model on collected vacancies and save a new model version",
+        )
+        parser.add_argument(
+            "-s",
+            "--save_result",
+            help="Save parsed result as DataFrame to CSV file.",
+            action="store_true",
+            default=None,
+        )
+        parser.add_argument(
+            "-u",
+            "--update",
+            action="store_true",
+            default=None,
+            help="Save command line args to file in JSON format.",
         )
 
         params, unknown = parser.parse_known_args(inputs_args)
@@ -75,7 +157,8 @@ class Settings:
 
 if __name__ == "__main__":
     settings = Settings(
-        config_path="../settings.json", input_args=("--num_workers", "5", "--refresh", "--text", "Data Scientist"),
+        config_path="../settings.json",
+        input_args=("--num_workers", "5", "--refresh", "--text", "Data Scientist"),
     )
 
     print(settings)
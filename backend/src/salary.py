@@ -0,0 +1,78 @@
+"""Salary normalization: convert salary columns to net RUR in one vectorized pass."""
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+BASE_CURRENCY = "RUR"
+# Net salary = 87% of gross (13% income tax)
+GROSS_TO_NET = 0.87
+
+
+class NormalizedSalaries(NamedTuple):
+    salary_from: np.ndarray
+    salary_to: np.ndarray
+    unknown_currency: np.ndarray
+
+
+class SalaryNormalizer:
+    """Convert (from, to, currency, gross) columns to net salaries in the base currency.
+
+    Parameters
+    ----------
+    rates : dict
+        Exchange rates: units of currency per one RUR, e.g. {"RUR": 1, "USD": 0.0126}.
+
+    Salaries in currencies absent from `rates` are not converted: they become NaN and are
+    flagged in `unknown_currency`, so they do not skew statistics.
+    """
+
+    def __init__(self, rates: Dict[str, float], gross_factor: float = GROSS_TO_NET):
+        self.rates = {cur: rate for cur, rate in (rates or {}).items() if rate}
+        self.rates.setdefault(BASE_CURRENCY, 1.0)
+        self.gross_factor = gross_factor
+
+    def normalize(
+        self,
+        salary_from: Iterable[Optional[float]],
+        salary_to: Iterable[Optional[float]],
+        currency: Iterable[Optional[str]],
+        gross: Iterable[Optional[bool]],
+    ) -> NormalizedSalaries:
+        values_from = np.array(list(salary_from), dtype=np.float64)
+        values_to = np.array(list(salary_to), dtype=np.float64)
+        currencies = np.array([cur or BASE_CURRENCY for cur in currency], dtype=object)
+        is_gross = np.array([bool(flag) for flag in gross], dtype=bool)
+
+        # Rates are looked up once per distinct currency, not once per vacancy
+        unique, inverse = np.unique(currencies.astype(str), return_inverse=True)
+        unique_rates = np.array([self.rates.get(cur, np.nan) for cur in unique], dtype=np.float64)
+        rates = unique_rates[inverse] if len(currencies) else np.empty(0)
+        unknown = np.isnan(rates)
+
+        factor = np.where(is_gross, self.gross_factor, 1.0) / rates
+        return NormalizedSalaries(np.trunc(values_from * factor), np.trunc(values_to * factor), unknown)
+
+    def normalize_records(self, records: List[Dict]) -> List[Dict]:
+        """Normalize `salary_from`/`salary_to` of vacancy dicts in place.
+
+        Records have raw values with `salary_currency` and `salary_gross` keys;
+        `salary_gross` is replaced with the `unknown_currency` flag. The raw currency is moved to
+        `original_currency` and `salary_currency` becomes the unit of the converted values
+        (`None` if there is no converted salary).
+        """
+        if not records:
+            return records
+        result = self.normalize(
+            (rec.get("salary_from") for rec in records),
+            (rec.get("salary_to") for rec in records),
+            (rec.get("salary_currency") for rec in records),
+            (rec.pop("salary_gross", None) for rec in records),
+        )
+        for rec, value_from, value_to, unknown in zip(records, *result):
+            rec["salary_from"] = None if np.isnan(value_from) else int(value_from)
+            rec["salary_to"] = None if np.isnan(value_to) else int(value_to)
+            rec["unknown_currency"] = bool(unknown)
+            rec["original_currency"] = rec.get("salary_currency")
+            has_value = rec["salary_from"] is not None or rec["salary_to"] is not None
+            rec["salary_currency"] = BASE_CURRENCY if has_value else None
+        return records
@@ -0,0 +1,290 @@
+"""Salary prediction model: trained once on collected vacancies, saved as versioned artifacts and reused.
+
+Layout of the model directory::
+
+    <model_dir>/<version>/model.joblib   - fitted regressor (features are hashed, there is no vocabulary)
+    <model_dir>/<version>/meta.json      - format, version, training size and metrics
+
+Versions are timestamps, the newest one is used for inference. scikit-learn (and joblib)
+are imported only when a model is trained or loaded, so they stay optional for the server.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.text import EXTRA_STOPWORDS, get_stopwords, tokenize
+
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+FORMAT_VERSION = 2
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "salary")
+
+logger = logging.getLogger(__name__)
+
+
+def average_salary(record: Dict) -> float:
+    """Mean of `salary_from` and `salary_to` (one of them if the other is missing), NaN without salary."""
+    values = [record.get(key) for key in ("salary_from", "salary_to")]
+    values = [value for value in values if value is not None and not np.isnan(value)]
+    return float(np.mean(values)) if values else np.nan
+
+
+def iter_batches(records: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class SalaryModel:
+    """Linear regression of the log average net salary on hashed vacancy features.
+
+    Key skills, title words, experience and description words are hashed into a fixed
+    number of columns (`n_features`), so there is no vocabulary to fit: the feature space
+    does not grow with the corpus, the same features are built for training and inference
+    and the model is trained incrementally with `partial_fit` on batches of vacancies.
+
+    Parameters
+    ----------
+    n_features : int
+        Number of hashed feature columns.
+    alpha : float
+        L2 regularization strength of the SGD regressor.
+    """
+
+    # Description has much more words than the other fields: its words are scaled to the unit L2 norm
+    DESCRIPTION_WEIGHT = 1.0
+
+    def __init__(self, n_features: int = 2**18, alpha: float = 1e-5):
+        self.n_features = n_features
+        self.alpha = alpha
+        self.version: Optional[str] = None
+        self.meta: Dict = {}
+        self._hasher = None
+        self._regressor = None
+        self._samples = 0
+        # Mean log salary of the first batch: SGD fits deviations from it, its intercept moves slowly
+        self._offset = 0.0
+
+    def __repr__(self):
+        return f"SalaryModel(version={self.version}, samples={self.meta.get('samples')})"
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._regressor is not None and self._samples > 0
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _stopwords() -> FrozenSet[str]:
+        return get_stopwords("english") | get_stopwords("russian") | EXTRA_STOPWORDS
+
+    @classmethod
+    def features(cls, record: Dict) -> Dict[str, float]:
+        """Named features of one vacancy, the input of the hasher."""
+        stopwords = cls._stopwords()
+        features = {}
+        experience = record.get("experience")
+        # Missing values may come as None or NaN (from a DataFrame)
+        if isinstance(experience, str) and experience:
+            features[f"experience={experience}"] = 1.0
+        for skill in record.get("key_skills") or []:
+            if isinstance(skill, str) and skill.strip():
+                features[f"skill={skill.strip().lower()}"] = 1.0
+        for word in tokenize(record.get("name"), stopwords=stopwords):
+            features[f"title={word}"] = 1.0
+        words = set(tokenize(record.get("description"), stopwords=stopwords))
+        for word in words:
+            features[f"desc={word}"] = cls.DESCRIPTION_WEIGHT / np.sqrt(len(words))
+        return features
+
+    def _features(self, records: List[Dict]):
+        if self._hasher is None:
+            from sklearn.feature_extraction import FeatureHasher
+
+            self._hasher = FeatureHasher(n_features=self.n_features, input_type="dict", alternate_sign=True)
+        return self._hasher.transform(self.features(rec) for rec in records)
+
+    def partial_fit(self, records: Iterable[Dict]) -> Tuple[int, float]:
+        """Update the model with one batch of vacancies, ones without salary or with unknown currency are skipped.
+
+        Returns the number of used vacancies and the sum of their absolute errors made before
+        the update (progressive validation).
+        """
+        train = [rec for rec in records if not rec.get("unknown_currency") and not np.isnan(average_salary(rec))]
+        if not train:
+            return 0, 0.0
+        if self._regressor is None:
+            from sklearn.linear_model import SGDRegressor
+
+            self._regressor = SGDRegressor(alpha=self.alpha, random_state=255)
+
+        x_batch = self._features(train)
+        targets = np.array([average_salary(rec) for rec in train])
+        error = float(np.abs(self._predict(x_batch) - targets).sum()) if self.is_fitted else 0.0
+        # Salaries are skewed and large: the model is fitted on the log scale
+        log_targets = np.log1p(targets)
+        if not self._samples:
+            self._offset = float(log_targets.mean())
+        self._regressor.partial_fit(x_batch, log_targets - self._offset)
+        self._samples += len(train)
+        return len(train), error
+
+    def fit(self, records: Iterable[Dict], epochs: int = 5, batch_size: int = 1000) -> "SalaryModel":
+        """Train on a stream of vacancies in batches of `batch_size`.
+
+        `records` is read `epochs` times if it can be iterated again (a list, a `VacancyTable`),
+        a one-shot iterator (e.g. a generator) is read once. A loaded model continues training.
+        The progressive MAE is measured in the first epoch only: later epochs see the same vacancies
+        again, so their errors are training errors.
+        """
+        import sklearn
+
+        if iter(records) is records:
+            epochs = 1
+        samples, evaluated, error = 0, 0, 0.0
+        for epoch in range(epochs):
+            for batch in iter_batches(records, batch_size):
+                # The first batch of a new model can not be predicted before the update
+                was_fitted = self.is_fitted
+                batch_samples, batch_error = self.partial_fit(batch)
+                if epoch == 0:
+                    samples += batch_samples
+                    if was_fitted:
+                        evaluated += batch_samples
+                        error += batch_error
+        if not samples:
+            raise ValueError("No vacancies with salary to train the model")
+
+        self.meta = {
+            "format": FORMAT_VERSION,
+            "samples": samples,
+            "updates": self._samples,
+            "features": self.n_features,
+            # Mean error on every batch of the first epoch before the model was updated with it
+            "progressive_mae": error / evaluated if evaluated else None,
+            "params": {"n_features": self.n_features, "alpha": self.alpha},
+            "sklearn": sklearn.__version__,
+        }
+        return self
+
+    def predict(self, records: List[Dict]) -> np.ndarray:
+        """Predicted average net salaries of `records` (one vectorized pass for the whole batch)."""
+        if not self.is_fitted:
+            raise ValueError("Salary model is not fitted")
+        if not records:
+            return np.empty(0)
+        return self._predict(self._features(records))
+
+    def _predict(self, x: "csr_matrix") -> np.ndarray:
+        return np.expm1(self._regressor.predict(x) + self._offset)
+
+    def predict_missing(self, records: List[Dict], key: str = "salary_predicted") -> int:
+        """Set `key` of vacancy dicts without salary to the predicted salary. Return the number of predictions."""
+        missing = [rec for rec in records if rec.get("salary_from") is None and rec.get("salary_to") is None]
+        for rec, value in zip(missing, self.predict(missing)):
+            rec[key] = int(value)
+        return len(missing)
+
+    def save(self, model_dir: str = MODEL_DIR) -> str:
+        """Save the model as a new version in `model_dir`. Return the version directory."""
+        import joblib
+
+        if not self.is_fitted:
+            raise ValueError("Salary model is not fitted")
+        os.makedirs(model_dir, exist_ok=True)
+        version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        tmp_path = os.path.join(model_dir, f".{version}.{uuid.uuid4().hex}.tmp")
+        os.makedirs(tmp_path)
+        # The hasher is stateless and is rebuilt from `params`
+        joblib.dump(
+            {"regressor": self._regressor, "samples": self._samples, "offset": self._offset},
+            os.path.join(tmp_path, "model.joblib"),
+        )
+        meta = {**self.meta, "version": version, "created": datetime.now().isoformat(timespec="seconds")}
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+        path = os.path.join(model_dir, version)
+        os.replace(tmp_path, path)
+        self.version, self.meta = version, meta
+        return path
+
+    @staticmethod
+    def latest_version(model_dir: str = MODEL_DIR) -> Optional[str]:
+        try:
+            names = os.listdir(model_dir)
+        except OSError:
+            return None
+        # Unfinished versions are saved to hidden temporary directories
+        versions = [
+            name
+            for name in names
+            if not name.startswith(".") and os.path.isfile(os.path.join(model_dir, name, "meta.json"))
+        ]
+        return max(versions) if versions else None
+
+    @classmethod
+    def load(cls, model_dir: str = MODEL_DIR, version: Optional[str] = None) -> "SalaryModel":
+        """Load `version` (the newest one by default) from `model_dir`."""
+        import joblib
+
+        version = version or cls.latest_version(model_dir)
+        if version is None:
+            raise FileNotFoundError(f"No salary model in {model_dir}")
+        path = os.path.join(model_dir, version)
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported salary model format: {meta.get('format')}")
+
+        artifacts = joblib.load(os.path.join(path, "model.joblib"))
+        model = cls(**meta.get("params", {}))
+        model._regressor = artifacts["regressor"]
+        model._samples = artifacts["samples"]
+        model._offset = artifacts["offset"]
+        model.version, model.meta = version, meta
+        return model
+
+
+class LatestSalaryModel:
+    """Thread-safe holder of the newest saved model for long running processes (e.g. server workers).
+
+    The model is loaded once and reloaded only when a newer version appears; the model
+    directory is checked at most every `check_interval` seconds.
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR, check_interval: float = 60):
+        self.model_dir = model_dir
+        self.check_interval = check_interval
+        self._model: Optional[SalaryModel] = None
+        self._checked = -float("inf")
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[SalaryModel]:
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._model
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return self._model
+            self._checked = now
+            version = SalaryModel.latest_version(self.model_dir)
+            if version is not None and (self._model is None or self._model.version != version):
+                try:
+                    self._model = SalaryModel.load(self.model_dir, version)
+                    logger.info(f"Loaded salary model {version}")
+                except (ImportError, OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Salary model {version} is not loaded: {str(e)}")
+        return self._model
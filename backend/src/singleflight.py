@@ -0,0 +1,98 @@
+"""Request coalescing: concurrent calls with the same key share one computation."""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are coalesced
+    fcntl = None
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run `func` once per key at a time.
+
+    Threads of one process wait for the leader's call and get its result (or exception).
+    Different processes (e.g. gunicorn workers) are serialized with an exclusive lock file
+    in `lock_dir`, so a follower process runs `func` only after the leader has finished.
+    `func` should therefore re-check the cache first to pick up the leader's result.
+    A lock file is removed by its holder before the lock is released, so `lock_dir` does not
+    grow with the number of distinct keys.
+
+    Parameters
+    ----------
+    lock_dir : str
+        Directory for lock files. `None` - coalesce threads only.
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None):
+        self.lock_dir = lock_dir
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    @contextmanager
+    def _process_lock(self, key: str):
+        if not self.lock_dir or fcntl is None:
+            yield
+            return
+
+        path = os.path.join(self.lock_dir, hashlib.sha1(key.encode()).hexdigest() + ".lock")
+        while True:
+            f = open(path, "a")
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            # The previous holder may have removed the file while we waited: then lock the new one
+            try:
+                if os.path.samestat(os.fstat(f.fileno()), os.stat(path)):
+                    break
+            except FileNotFoundError:
+                pass
+            f.close()
+        try:
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._process_lock(key):
+                call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
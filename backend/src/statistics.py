@@ -0,0 +1,156 @@
+"""Incremental, mergeable statistics for salaries, experience and skills."""
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+NO_EXPERIENCE_LABEL = "Не указан"
+
+
+class SalaryStats:
+    """Streaming min/max/mean and exact quantiles of salary values.
+
+    Values are kept as a histogram `{value: count}`: salaries repeat a lot (100000, 150000, ...),
+    so the histogram is small and two accumulators are merged in O(distinct values).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.values: Counter = Counter()
+
+    def add(self, value: float, count: int = 1):
+        self.count += count
+        self.total += value * count
+        self.values[value] += count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "SalaryStats") -> "SalaryStats":
+        if other.count:
+            self.count += other.count
+            self.total += other.total
+            self.values.update(other.values)
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    def quantile(self, q: float) -> float:
+        """Exact quantile with linear interpolation between the closest ranks (like `numpy.quantile`)."""
+        if not self.count:
+            return 0
+        position = q * (self.count - 1)
+        lower_rank, fraction = int(position), position - int(position)
+        lower = upper = None
+        seen = 0
+        for value in sorted(self.values):
+            seen += self.values[value]
+            if lower is None and seen > lower_rank:
+                lower = value
+            if seen > lower_rank + 1 or (seen > lower_rank and not fraction):
+                upper = value
+                break
+        if upper is None:
+            upper = lower
+        return lower + (upper - lower) * fraction
+
+    @property
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+    def summary(self) -> Dict:
+        if not self.count:
+            return {"min": 0, "max": 0, "mean": 0, "median": 0}
+        return {"min": self.min, "max": self.max, "mean": self.mean, "median": self.median}
+
+    def to_dict(self) -> Dict:
+        return {"values": [[value, count] for value, count in self.values.items()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SalaryStats":
+        stats = cls()
+        for value, count in data.get("values", []):
+            stats.add(value, count)
+        return stats
+
+
+class VacancyStatistics:
+    """Accumulator of `/api/search` statistics: salaries, experience distribution and top skills.
+
+    Vacancies are added one by one (e.g. while they are streamed) and partial accumulators
+    from pages, workers or cached shards are combined with `merge`.
+    """
+
+    def __init__(self, top_k: int = 20):
+        self.top_k = top_k
+        self.count = 0
+        self.salary = SalaryStats()
+        self.experience: Counter = Counter()
+        self.skills: Counter = Counter()
+        self.vacancies_with_skills = 0
+
+    def add(self, vacancy: Dict):
+        self.count += 1
+        for key in ("salary_from", "salary_to"):
+            if vacancy.get(key):
+                self.salary.add(vacancy[key])
+        self.experience[vacancy.get("experience") or NO_EXPERIENCE_LABEL] += 1
+
+        key_skills = vacancy.get("key_skills")
+        if key_skills:
+            self.vacancies_with_skills += 1
+            for skill in key_skills:
+                if skill and isinstance(skill, str) and skill.strip():
+                    self.skills[skill.strip()] += 1
+
+    def update(self, vacancies: Iterable[Dict]) -> "VacancyStatistics":
+        for vacancy in vacancies:
+            self.add(vacancy)
+        return self
+
+    def merge(self, other: "VacancyStatistics") -> "VacancyStatistics":
+        self.count += other.count
+        self.salary.merge(other.salary)
+        self.experience.update(other.experience)
+        self.skills.update(other.skills)
+        self.vacancies_with_skills += other.vacancies_with_skills
+        return self
+
+    def top_skills(self, k: Optional[int] = None) -> Dict:
+        """Top-k skills by frequency (heap selection, no full sort)."""
+        return dict(self.skills.most_common(k or self.top_k))
+
+    def summary(self, total: Optional[int] = None) -> Dict:
+        """Statistics in the format of the `/api/search` response."""
+        return {
+            "total": self.count if total is None else total,
+            "salary_stats": self.salary.summary(),
+            "experience_distribution": dict(self.experience),
+            "top_skills": self.top_skills(),
+            "skills_stats": {"total_vacancies_with_skills": self.vacancies_with_skills},
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "salary": self.salary.to_dict(),
+            "experience": dict(self.experience),
+            "skills": dict(self.skills),
+            "vacancies_with_skills": self.vacancies_with_skills,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, top_k: int = 20) -> "VacancyStatistics":
+        stats = cls(top_k=top_k)
+        stats.count = data["count"]
+        stats.salary = SalaryStats.from_dict(data["salary"])
+        stats.experience = Counter(data["experience"])
+        stats.skills = Counter(data["skills"])
+        stats.vacancies_with_skills = data["vacancies_with_skills"]
+        return stats
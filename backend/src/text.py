@@ -0,0 +1,71 @@
+"""Text processing helpers: HTML to text conversion, tokenizer and word frequency counting."""
+import html
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+_BLOCK_TAGS = re.compile(r"<\s*(?:br|p|/p|li|/li|div|/div|/h\d|/ul|/ol|tr|/tr)\b[^>]*>", re.IGNORECASE)
+_TAGS = re.compile(r"<[^>]*>")
+_SPACES = re.compile(r"[ \t\r\f\v\xa0]+")
+_NEWLINES = re.compile(r"\s*\n\s*")
+_DIGITS = re.compile(r"\d+")
+_WORDS = re.compile("[a-zA-Z]+")
+_TOKENS = re.compile(r"[^\W\d_]+")
+
+# HTML entities leftovers which are not real words
+EXTRA_STOPWORDS = frozenset({"amp", "quot"})
+
+
+def html_to_text(html_text: Optional[str]) -> str:
+    """Convert HTML of a vacancy description to plain text.
+
+    Block tags (<p>, <li>, <br> etc.) become line breaks, other tags are removed,
+    entities (&amp;, &quot;, &nbsp; ...) are decoded and spaces are collapsed.
+    """
+    if not html_text:
+        return ""
+    text = _BLOCK_TAGS.sub("\n", html_text)
+    text = html.unescape(_TAGS.sub("", text))
+    text = _SPACES.sub(" ", text)
+    return _NEWLINES.sub("\n", text).strip()
+
+
+@lru_cache(maxsize=None)
+def get_stopwords(language: str = "english") -> FrozenSet[str]:
+    """NLTK stopwords for `language`, loaded (and downloaded if needed) once per process."""
+    import nltk
+
+    try:
+        words = nltk.corpus.stopwords.words(language)
+    except LookupError:
+        nltk.download("stopwords")
+        words = nltk.corpus.stopwords.words(language)
+    return frozenset(words)
+
+
+def iter_words(texts: Iterable[str], min_len: int = 3, stopwords: FrozenSet[str] = frozenset()) -> Iterator[str]:
+    """Yield lower case latin words of every text one by one.
+
+    Digits are removed before splitting, words shorter than `min_len` and `stopwords` are skipped.
+    """
+    for text in texts:
+        if not isinstance(text, str):
+            continue
+        for word in _WORDS.findall(_DIGITS.sub("", text.lower())):
+            if len(word) >= min_len and word not in stopwords:
+                yield word
+
+
+def tokenize(text: Optional[str], min_len: int = 2, stopwords: FrozenSet[str] = frozenset()) -> List[str]:
+    """Lower case words of any alphabet (latin, cyrillic ...) without digits, short words and `stopwords`."""
+    if not isinstance(text, str):
+        return []
+    return [word for word in _TOKENS.findall(text.lower()) if len(word) >= min_len and word not in stopwords]
+
+
+def count_words(
+    texts: Iterable[str], top_k: Optional[int] = None, min_len: int = 3, stopwords: FrozenSet[str] = frozenset()
+) -> List[Tuple[str, int]]:
+    """Most frequent words of `texts` as (word, count) pairs. Runs in linear time of the corpus size."""
+    return Counter(iter_words(texts, min_len, stopwords)).most_common(top_k)
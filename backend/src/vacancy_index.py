@@ -0,0 +1,249 @@
+"""Local full-text index of collected vacancies (SQLite FTS5).
+
+Every vacancy seen by the server or the collector is stored once by id with its name, key skills,
+employer, experience, area, net RUR salary and cleaned description. Name, skills, employer and
+description are indexed with FTS5, so queries are answered locally in milliseconds::
+
+    index = get_vacancy_index()
+    index.upsert(records)
+    total, rows = index.search("python developer", limit=100)
+
+The database is shared by all processes (WAL journal), every thread uses its own connection.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.cache import CACHE_DIR
+
+VACANCY_INDEX_PATH = os.path.join(CACHE_DIR, "vacancies.db")
+
+# Names of experience ids of the hh.ru dictionary: the index stores names like the vacancy records
+EXPERIENCE_NAMES = {
+    "noExperience": "Нет опыта",
+    "between1And3": "От 1 года до 3 лет",
+    "between3And6": "От 3 до 6 лет",
+    "moreThan6": "Более 6 лет",
+}
+
+COLUMNS = (
+    "id",
+    "name",
+    "employer",
+    "employer_url",
+    "experience",
+    "area",
+    "salary_from",
+    "salary_to",
+    "salary_currency",
+    "unknown_currency",
+    "key_skills",
+    "description",
+    "indexed_at",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vacancies (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    employer TEXT,
+    employer_url TEXT,
+    experience TEXT,
+    area TEXT,
+    salary_from REAL,
+    salary_to REAL,
+    salary_currency TEXT,
+    unknown_currency INTEGER,
+    key_skills TEXT,
+    description TEXT,
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS vacancies_indexed_at ON vacancies (indexed_at);
+-- Full-text index over the columns of `vacancies` (skills are indexed as their JSON list), kept in sync by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS vacancies_fts USING fts5(
+    name, key_skills, employer, description,
+    content='vacancies', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS vacancies_ai AFTER INSERT ON vacancies BEGIN
+    INSERT INTO vacancies_fts (rowid, name, key_skills, employer, description)
+    VALUES (new.rowid, new.name, new.key_skills, new.employer, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS vacancies_ad AFTER DELETE ON vacancies BEGIN
+    INSERT INTO vacancies_fts (vacancies_fts, rowid, name, key_skills, employer, description)
+    VALUES ('delete', old.rowid, old.name, old.key_skills, old.employer, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS vacancies_au AFTER UPDATE ON vacancies BEGIN
+    INSERT INTO vacancies_fts (vacancies_fts, rowid, name, key_skills, employer, description)
+    VALUES ('delete', old.rowid, old.name, old.key_skills, old.employer, old.description);
+    INSERT INTO vacancies_fts (rowid, name, key_skills, employer, description)
+    VALUES (new.rowid, new.name, new.key_skills, new.employer, new.description);
+END;
+"""
+
+# Weights of the FTS columns in the bm25 rank: name, skills, employer, description
+_RANK = "bm25(vacancies_fts, 10.0, 5.0, 2.0, 1.0)"
+_WORDS = re.compile(r"\w+")
+
+
+def match_expression(text: Optional[str]) -> Optional[str]:
+    """FTS5 query which matches documents with all words of `text`, `None` for an empty text.
+
+    Words are quoted, so the syntax of FTS5 queries (AND, OR, NEAR, `*` ...) is not interpreted.
+    """
+    words = _WORDS.findall((text or "").lower())
+    return " ".join(f'"{word}"' for word in words) if words else None
+
+
+class VacancyIndex:
+    """Vacancy store with a full-text index.
+
+    Parameters
+    ----------
+    path : str
+        SQLite database file, created if it does not exist.
+    timeout : float
+        Seconds to wait for a write lock held by another process.
+    """
+
+    def __init__(self, path: str = VACANCY_INDEX_PATH, timeout: float = 30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not be shared between threads and must not survive a fork
+        conn, pid = getattr(self._local, "conn", None), getattr(self._local, "pid", None)
+        if conn is None or pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _row(record: Dict, now: float) -> Tuple:
+        employer = record.get("employer")
+        employer_url = record.get("employer_url")
+        # Server records keep the employer as {"name", "url"}, collector records - as a name
+        if isinstance(employer, dict):
+            employer, employer_url = employer.get("name"), employer.get("url")
+        skills = [skill for skill in record.get("key_skills") or [] if isinstance(skill, str) and skill]
+        values = {
+            **{key: record.get(key) for key in COLUMNS},
+            "id": str(record["id"]),
+            "employer": employer,
+            "employer_url": employer_url,
+            "area": str(record["area"]) if record.get("area") is not None else None,
+            "unknown_currency": int(bool(record.get("unknown_currency"))),
+            "key_skills": json.dumps(skills, ensure_ascii=False),
+            "indexed_at": now,
+        }
+        # Missing salaries come as NaN from tables
+        for key in ("salary_from", "salary_to"):
+            if values[key] is not None and values[key] != values[key]:
+                values[key] = None
+        return tuple(values[key] for key in COLUMNS)
+
+    def upsert(self, records: Iterable[Dict]) -> int:
+        """Insert or replace vacancies (salaries must be normalized to net RUR). Return the number of them."""
+        now = time.time()
+        rows = [self._row(record, now) for record in records if record and record.get("id") is not None]
+        if not rows:
+            return 0
+        conn = self._connection()
+        updates = ", ".join(f"{key} = excluded.{key}" for key in COLUMNS[1:])
+        with conn:
+            conn.executemany(
+                f"INSERT INTO vacancies ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)}) "
+                f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                rows,
+            )
+        return len(rows)
+
+    def delete(self, ids: Iterable[str]):
+        """Remove vacancies (e.g. closed ones) from the index."""
+        conn = self._connection()
+        with conn:
+            conn.executemany("DELETE FROM vacancies WHERE id = ?", [(str(vacancy_id),) for vacancy_id in ids])
+
+    def search(
+        self,
+        text: Optional[str],
+        limit: int = 20,
+        area: Optional[str] = None,
+        experience: Optional[str] = None,
+        max_age: Optional[float] = None,
+    ) -> Tuple[int, List[Dict]]:
+        """Find vacancies with all words of `text` in name, skills, employer or description.
+
+        Parameters
+        ----------
+        text : str
+            Search query. Empty - all vacancies, the most recently indexed first.
+        limit : int
+            Max number of returned vacancies, the most relevant ones (BM25, matches in the name count most).
+        area : str
+            hh.ru area id of vacancies.
+        experience : str
+            Experience id (`between1And3` ...) or name.
+        max_age : float
+            Skip vacancies indexed more than `max_age` seconds ago.
+
+        Returns
+        -------
+        tuple
+            Number of all matching vacancies and the found vacancy records (`key_skills` is a list).
+        """
+        match = match_expression(text)
+        conditions, params = [], []
+        if match:
+            conditions.append("vacancies_fts MATCH ?")
+            params.append(match)
+        if area is not None:
+            conditions.append("v.area = ?")
+            params.append(str(area))
+        if experience:
+            conditions.append("v.experience = ?")
+            params.append(EXPERIENCE_NAMES.get(experience, experience))
+        if max_age is not None:
+            conditions.append("v.indexed_at >= ?")
+            params.append(time.time() - max_age)
+
+        source = "vacancies_fts JOIN vacancies v ON v.rowid = vacancies_fts.rowid" if match else "vacancies v"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = _RANK if match else "v.indexed_at DESC"
+        conn = self._connection()
+        total = conn.execute(f"SELECT count(*) FROM {source} {where}", params).fetchone()[0]
+        rows = conn.execute(f"SELECT v.* FROM {source} {where} ORDER BY {order} LIMIT ?", params + [limit]).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(row)
+            record["key_skills"] = json.loads(record["key_skills"] or "[]")
+            record["unknown_currency"] = bool(record["unknown_currency"])
+            records.append(record)
+        return total, records
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM vacancies").fetchone()[0]
+
+
+_vacancy_index: Optional[VacancyIndex] = None
+_vacancy_index_lock = threading.Lock()
+
+
+def get_vacancy_index() -> VacancyIndex:
+    """Process-wide vacancy index. The database file is configured with VACANCY_INDEX_PATH."""
+    global _vacancy_index
+    if _vacancy_index is None:
+        with _vacancy_index_lock:
+            if _vacancy_index is None:
+                _vacancy_index = VacancyIndex(os.environ.get("VACANCY_INDEX_PATH", VACANCY_INDEX_PATH))
+    return _vacancy_index
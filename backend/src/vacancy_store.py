@@ -0,0 +1,237 @@
+"""Columnar on-disk storage of collected vacancies.
+
+Layout of a table directory::
+
+    meta.json                  - number of rows, present columns and dictionaries
+    salary_from.npy            - float64, NaN for missing values
+    salary_to.npy              - float64
+    has_salary.npy             - bool
+    unknown_currency.npy       - bool, salary currency has no exchange rate
+    <category>.codes.npy       - int32 codes into meta["dictionaries"][<category>], -1 for missing
+    key_skills.offsets.npy     - int64, row i has skills codes[offsets[i]:offsets[i + 1]]
+    key_skills.codes.npy       - int32 codes into meta["dictionaries"]["key_skills"]
+    <string>.offsets.npy       - int64 offsets into <string>.data.npy
+    <string>.data.npy          - uint8, concatenated UTF-8 values
+
+All arrays are plain `.npy` files, so they can be memory-mapped and do not depend
+on the Python version (unlike pickle).
+"""
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# 2: salary_currency, original_currency and unknown_currency columns
+FORMAT_VERSION = 2
+
+
+class VacancyTable:
+    NUMERIC_COLUMNS = ("salary_from", "salary_to")
+    BOOL_COLUMNS = ("has_salary", "unknown_currency")
+    CATEGORY_COLUMNS = ("employer", "experience", "schedule", "salary_currency", "original_currency")
+    STRING_COLUMNS = ("id", "name", "description")
+    LIST_COLUMNS = ("key_skills",)
+    COLUMNS = (
+        "id",
+        "name",
+        "employer",
+        "has_salary",
+        "salary_from",
+        "salary_to",
+        "salary_currency",
+        "original_currency",
+        "unknown_currency",
+        "experience",
+        "schedule",
+        "key_skills",
+        "description",
+    )
+
+    def __init__(self, arrays: Dict[str, np.ndarray], dictionaries: Dict[str, List[str]], columns: List[str]):
+        self._arrays = arrays
+        self.dictionaries = dictionaries
+        self.columns = [col for col in self.COLUMNS if col in columns]
+
+    def __len__(self) -> int:
+        return len(self._arrays["salary_from"])
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.to_records()
+
+    def __repr__(self):
+        return f"VacancyTable(rows={len(self)}, columns={self.columns})"
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "VacancyTable":
+        """Build a table from vacancy dicts (the output of `DataCollector.get_vacancy`)."""
+        records = list(records)
+        present = set()
+        for record in records:
+            present.update(record.keys())
+        if "salary_from" in present or "salary_to" in present:
+            present.add("has_salary")
+
+        arrays = {}
+        for col in cls.NUMERIC_COLUMNS:
+            values = [record.get(col) for record in records]
+            arrays[col] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+        has_salary = [record.get("has_salary") for record in records]
+        arrays["has_salary"] = np.array(
+            [
+                bool(flag) if flag is not None else not (np.isnan(sal_from) and np.isnan(sal_to))
+                for flag, sal_from, sal_to in zip(has_salary, arrays["salary_from"], arrays["salary_to"])
+            ],
+            dtype=bool,
+        )
+
+        arrays["unknown_currency"] = np.array([bool(record.get("unknown_currency")) for record in records], dtype=bool)
+
+        dictionaries = {}
+        for col in cls.CATEGORY_COLUMNS:
+            index: Dict[str, int] = {}
+            codes = np.empty(len(records), dtype=np.int32)
+            for i, record in enumerate(records):
+                value = record.get(col)
+                codes[i] = -1 if value is None else index.setdefault(value, len(index))
+            arrays[f"{col}.codes"] = codes
+            dictionaries[col] = list(index)
+
+        for col in cls.LIST_COLUMNS:
+            index = {}
+            offsets = np.zeros(len(records) + 1, dtype=np.int64)
+            codes = []
+            for i, record in enumerate(records):
+                for value in record.get(col) or []:
+                    if value is not None:
+                        codes.append(index.setdefault(value, len(index)))
+                offsets[i + 1] = len(codes)
+            arrays[f"{col}.offsets"] = offsets
+            arrays[f"{col}.codes"] = np.array(codes, dtype=np.int32)
+            dictionaries[col] = list(index)
+
+        for col in cls.STRING_COLUMNS:
+            encoded = [str(record.get(col) or "").encode("utf-8") for record in records]
+            offsets = np.zeros(len(records) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            arrays[f"{col}.offsets"] = offsets
+            arrays[f"{col}.data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        return cls(arrays, dictionaries, sorted(present))
+
+    def save(self, path: str):
+        """Write the table to directory `path` (replaced atomically)."""
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = os.path.join(parent, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+        os.makedirs(tmp_path)
+        for name, array in self._arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        meta = {
+            "version": FORMAT_VERSION,
+            "rows": len(self),
+            "columns": self.columns,
+            "dictionaries": self.dictionaries,
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        if os.path.isdir(path):
+            old_path = f"{tmp_path}.old"
+            os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_meta(path: str) -> Dict:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "VacancyTable":
+        """Open a saved table. Arrays are memory-mapped (read-only) by default.
+
+        Raise ValueError for a table written in another format version.
+        """
+        meta = cls._read_meta(path)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vacancy table version: {meta.get('version')}")
+
+        arrays = {}
+        for file_name in os.listdir(path):
+            if file_name.endswith(".npy"):
+                arrays[file_name[: -len(".npy")]] = np.load(
+                    os.path.join(path, file_name), mmap_mode="r" if mmap else None
+                )
+        return cls(arrays, meta["dictionaries"], meta["columns"])
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """Whether a table of the current format version is saved in `path`.
+
+        Tables of other versions do not count, so callers collect the data again and replace them.
+        """
+        try:
+            return cls._read_meta(path).get("version") == FORMAT_VERSION
+        except (OSError, ValueError):
+            return False
+
+    def strings(self, col: str) -> List[str]:
+        data = self._arrays[f"{col}.data"].tobytes()
+        offsets = self._arrays[f"{col}.offsets"].tolist()
+        return [data[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def codes(self, col: str) -> np.ndarray:
+        return self._arrays[f"{col}.codes"]
+
+    def lists(self, col: str) -> List[List[str]]:
+        dictionary = np.array(self.dictionaries[col], dtype=object)
+        values = dictionary[self._arrays[f"{col}.codes"]] if len(dictionary) else np.array([], dtype=object)
+        offsets = self._arrays[f"{col}.offsets"]
+        return [list(chunk) for chunk in np.split(values, offsets[1:-1])] if len(self) else []
+
+    def numeric(self, col: str) -> np.ndarray:
+        return self._arrays[col]
+
+    def to_dataframe(self):
+        """Build a DataFrame indexed by vacancy id. Category columns are `pandas.Categorical`."""
+        import pandas as pd
+
+        data = {}
+        for col in self.columns:
+            if col in self.NUMERIC_COLUMNS or col in self.BOOL_COLUMNS:
+                data[col] = np.asarray(self._arrays[col])
+            elif col in self.CATEGORY_COLUMNS:
+                data[col] = pd.Categorical.from_codes(np.asarray(self.codes(col)), categories=self.dictionaries[col])
+            elif col in self.LIST_COLUMNS:
+                data[col] = self.lists(col)
+            else:
+                data[col] = self.strings(col)
+        ids = self.strings("id")
+        return pd.DataFrame(data, columns=self.columns, index=pd.Index(ids))
+
+    def to_records(self) -> Iterator[Dict]:
+        """Yield rows as vacancy dicts (the inverse of `from_records`)."""
+        columns = {}
+        for col in self.columns:
+            if col in self.NUMERIC_COLUMNS:
+                columns[col] = [None if np.isnan(v) else int(v) for v in self._arrays[col]]
+            elif col in self.BOOL_COLUMNS:
+                columns[col] = [bool(v) for v in self._arrays[col]]
+            elif col in self.CATEGORY_COLUMNS:
+                dictionary = self.dictionaries[col]
+                columns[col] = [dictionary[code] if code >= 0 else None for code in self.codes(col)]
+            elif col in self.LIST_COLUMNS:
+                columns[col] = self.lists(col)
+            else:
+                columns[col] = self.strings(col)
+        for i in range(len(self)):
+            yield {col: values[i] for col, values in columns.items()}
+
+    def ids(self) -> List[str]:
+        return self.strings("id")
@@ -0,0 +1,90 @@
+import os
+
+from src.cache import EncodedResponse, ResponseCache, ResultCache, VacancyCache, normalize_key
+
+
+def test_normalize_key_ignores_case_and_spaces():
+    assert normalize_key(" Python  Developer ", 113, None, "all") == "python developer|113||all"
+    assert normalize_key("python developer", "113", "", "ALL") == normalize_key("Python\tdeveloper", 113, None, "all")
+
+
+def test_expired_entries_are_removed_from_memory_and_disk(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.set("fresh", {"value": 1})
+    cache.set("stale", {"value": 2}, ttl=-1)
+
+    assert cache.get("fresh") == {"value": 1}
+    assert cache.get("stale") is None
+    assert not os.path.exists(cache._path("stale"))
+
+    # Entries are read from disk after the memory tier is cleared
+    cache.clear()
+    assert cache.get("fresh") == {"value": 1}
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["expired"] == 1
+
+
+def test_expired_entry_on_disk(tmp_path):
+    ResultCache(str(tmp_path)).set("key", [1, 2], ttl=-1)
+    cache = ResultCache(str(tmp_path))
+    assert cache.get("key") is None
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_memory_tier_is_lru(tmp_path):
+    cache = ResultCache(str(tmp_path), max_items=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.stats()["memory_items"] == 2
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    # "b" was the least recently used: it is evicted from memory but still on disk
+    assert cache.stats()["disk_hits"] == 0
+    assert cache.get("b") == 2
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_evicts_oldest_files(tmp_path):
+    cache = ResultCache(str(tmp_path), max_disk_bytes=250)
+    for i in range(10):
+        cache.set(f"key{i}", "x" * 50)
+        os.utime(cache._path(f"key{i}"), (i, i))
+    files = os.listdir(str(tmp_path))
+
+    assert 0 < len(files) < 10
+    assert sum(os.path.getsize(os.path.join(str(tmp_path), name)) for name in files) <= 250
+    assert os.path.exists(cache._path("key9"))
+    assert not os.path.exists(cache._path("key0"))
+    assert cache.stats()["evictions"] == 10 - len(files)
+
+
+def test_response_cache_keeps_encoded_bodies(tmp_path):
+    data = {"vacancies": [{"name": "Разработчик"}], "statistics": {"total": 1}}
+    ResponseCache(str(tmp_path)).set("key", EncodedResponse.from_data(data))
+
+    response = ResponseCache(str(tmp_path)).get("key")
+    assert response.data() == data
+    assert response.etag == EncodedResponse.from_data(data).etag
+    assert "gzip" in response.encodings
+
+
+def test_response_cache_rejects_truncated_entry(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.set("key", EncodedResponse.from_data({"value": 1}))
+    path = cache._path("key")
+    with open(path, "rb") as f:
+        content = f.read()
+    with open(path, "wb") as f:
+        f.write(content[:-5])
+
+    assert ResponseCache(str(tmp_path)).get("key") is None
+
+
+def test_vacancy_cache_is_addressed_by_id(tmp_path):
+    cache = VacancyCache(str(tmp_path))
+    cache.set(12345, {"id": "12345"})
+
+    assert os.listdir(str(tmp_path)) == ["12345.json"]
+    assert VacancyCache(str(tmp_path)).get("12345") == {"id": "12345"}
@@ -0,0 +1,128 @@
+import json
+import os
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+import src.data_collector as data_collector
+from src.cache import VacancyCache
+from src.data_collector import DataCollector
+from src.vacancy_index import VacancyIndex
+from src.vacancy_store import VacancyTable
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeClient:
+    """hh.ru API with a listing of `stamps` ({id: updated_at}) and details which fail for `fail_ids`."""
+
+    def __init__(self, stamps):
+        self.stamps = stamps
+        self.fail_ids = set()
+        self.fetched = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        path = urlsplit(url).path.rstrip("/")
+        if path.endswith("/vacancies"):
+            items = [
+                {"id": vacancy_id, "published_at": "2024-01-01", "updated_at": updated_at}
+                for vacancy_id, updated_at in self.stamps.items()
+            ]
+            return FakeResponse({"found": len(items), "pages": 1, "items": items})
+
+        vacancy_id = path.rsplit("/", 1)[1]
+        self.fetched.append(vacancy_id)
+        if vacancy_id in self.fail_ids:
+            raise requests.exceptions.ConnectionError("boom")
+        return FakeResponse(
+            {
+                "id": vacancy_id,
+                "name": f"Vacancy {vacancy_id} {self.stamps[vacancy_id]}",
+                "employer": {"name": "Employer"},
+                "salary": {"from": 1000, "to": None, "currency": "RUR", "gross": False},
+                "experience": {"id": "noExperience", "name": "Нет опыта"},
+                "key_skills": [{"name": "Python"}],
+                "description": "<p>Python developer</p>",
+            }
+        )
+
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_collector, "CACHE_DIR", str(tmp_path))
+    client = FakeClient({"1": "v1", "2": "v1", "3": "v1"})
+    collector = DataCollector(
+        {"RUR": 1},
+        client=client,
+        vacancy_cache=VacancyCache(str(tmp_path / "vacancies")),
+        vacancy_index=VacancyIndex(str(tmp_path / "index.db")),
+    )
+    return collector, client
+
+
+def load_index(tmp_path):
+    [name] = [name for name in os.listdir(tmp_path) if name.endswith(".index.json")]
+    with open(tmp_path / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_incremental_update_keeps_failed_vacancies_stale(collector, tmp_path):
+    collector, client = collector
+    query = {"text": "python"}
+    table = collector.collect_vacancies(query, refresh=True)
+    assert sorted(table.ids()) == ["1", "2", "3"]
+
+    # 1 is unchanged, 2 is updated but fails to download, 3 is removed, 4 is new
+    client.stamps = {"1": "v1", "2": "v2", "4": "v1"}
+    client.fail_ids = {"2"}
+    client.fetched = []
+    table = collector.collect_vacancies(query, incremental=True)
+
+    assert sorted(client.fetched) == ["2", "4"]
+    records = {record["id"]: record for record in table.to_records()}
+    assert sorted(records) == ["1", "2", "4"]
+    assert records["2"]["name"] == "Vacancy 2 v1"
+    index = load_index(tmp_path)
+    assert index["1"] == {"published_at": "2024-01-01", "updated_at": "v1", "removed_at": None}
+    assert index["2"]["updated_at"] == "v1"
+    assert index["3"]["removed_at"] is not None
+    assert index["4"]["updated_at"] == "v1"
+
+    # The failed vacancy is fetched again by the next run
+    client.fail_ids = set()
+    client.fetched = []
+    table = collector.collect_vacancies(query, incremental=True)
+
+    assert client.fetched == ["2"]
+    records = {record["id"]: record for record in table.to_records()}
+    assert records["2"]["name"] == "Vacancy 2 v2"
+    assert load_index(tmp_path)["2"]["updated_at"] == "v2"
+
+
+def test_table_of_old_version_is_collected_again(collector, tmp_path):
+    collector, client = collector
+    query = {"text": "python"}
+    collector.collect_vacancies(query)
+    [table_dir] = [name for name in os.listdir(tmp_path) if name.endswith(".vacancies")]
+    meta_path = tmp_path / table_dir / "meta.json"
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({**meta, "version": 1}, f)
+
+    # The old table is not read: all vacancies are collected (details come from the vacancy cache)
+    table = collector.collect_vacancies(query, incremental=True)
+
+    assert sorted(table.ids()) == ["1", "2", "3"]
+    assert VacancyTable.exists(str(tmp_path / table_dir))
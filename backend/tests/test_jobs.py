@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from src.jobs import Job, JobManager
+
+
+def write_state(manager, job_id, status, pid, mtime=None):
+    path = os.path.join(manager.state_dir, f"{job_id}.json")
+    state = {**Job(job_id, {"query": "python"}).to_dict(), "status": status, "pid": pid}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_job_of_exited_worker_is_failed(tmp_path):
+    manager = JobManager(state_dir=str(tmp_path), ttl=60)
+    write_state(manager, "dead", Job.RUNNING, exited_pid())
+
+    job = manager.get("dead")
+    assert job.status == Job.FAILED
+    assert job.error
+    # Other workers read the failed state from the file
+    assert JobManager(state_dir=str(tmp_path), ttl=60).get("dead").status == Job.FAILED
+
+
+def test_stale_job_is_failed_and_expired_job_is_forgotten(tmp_path):
+    manager = JobManager(state_dir=str(tmp_path), ttl=60)
+    write_state(manager, "alive", Job.RUNNING, os.getppid())
+    write_state(manager, "stale", Job.RUNNING, os.getppid(), mtime=time.time() - 120)
+
+    assert manager.get("alive").status == Job.RUNNING
+    assert manager.get("stale").status == Job.FAILED
+
+    later = JobManager(state_dir=str(tmp_path), ttl=0)
+    time.sleep(0.01)
+    assert later.get("stale") is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "stale.json"))
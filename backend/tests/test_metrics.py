@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+
+from src.metrics import TOTAL_FILE, MetricsRegistry
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def write_worker(directory, file_name, value):
+    with open(os.path.join(directory, file_name), "w") as f:
+        json.dump({"counters": {"requests_total": [[[], value]]}, "histograms": {}}, f)
+
+
+def scrape(registry):
+    return [line for line in registry.render().splitlines() if line.startswith("requests_total ")]
+
+
+def test_counters_of_finished_workers_are_kept(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    registry.counter("requests_total")
+    registry.inc("requests_total", 2)
+    pid = exited_pid()
+    write_worker(str(tmp_path), f"{pid}-a.json", 5)
+    assert scrape(registry) == ["requests_total 7"]
+
+    # The finished worker is folded into the total, a new worker with the same pid has its own file
+    assert f"{pid}-a.json" not in os.listdir(str(tmp_path))
+    write_worker(str(tmp_path), f"{pid}-b.json", 1)
+    assert scrape(registry) == ["requests_total 8"]
+    assert scrape(registry) == ["requests_total 8"]
+
+
+def test_interrupted_fold_is_not_counted_twice(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    write_worker(str(tmp_path), f"{exited_pid()}-a.json", 5)
+    assert scrape(registry) == ["requests_total 5"]
+
+    # The file is left on disk as if the fold had stopped before removing it
+    with open(os.path.join(str(tmp_path), TOTAL_FILE), "r") as f:
+        [folded] = json.load(f)["folded"]
+    write_worker(str(tmp_path), folded, 5)
+    assert scrape(registry) == ["requests_total 5"]
+    assert folded not in os.listdir(str(tmp_path))
@@ -0,0 +1,90 @@
+import pytest
+import requests
+
+from src.paginator import VacancyPaginator
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeListing:
+    """hh.ru listing of `found` vacancies: pages of `per_page` items, no more than 2000 items in total."""
+
+    def __init__(self, found, fail_pages=()):
+        self.found = found
+        self.fail_pages = set(fail_pages)
+        self.requested = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        page, per_page = params["page"], params["per_page"]
+        self.requested.append((page, per_page))
+        if page in self.fail_pages:
+            raise requests.exceptions.ConnectionError("boom")
+        depth = min(self.found, VacancyPaginator.MAX_DEPTH)
+        ids = range(page * per_page, min((page + 1) * per_page, depth))
+        pages = -(-depth // per_page)
+        return FakeResponse({"found": self.found, "pages": pages, "items": [{"id": str(i)} for i in ids]})
+
+
+def collect(found, limit=None, per_page=100, **kwargs):
+    client = FakeListing(found, **kwargs)
+    paginator = VacancyPaginator("https://api.hh.ru/vacancies", client=client, max_workers=3)
+    items = list(paginator.iter_items({"text": "python", "per_page": per_page}, limit=limit))
+    return [int(item["id"]) for item in items], client, paginator
+
+
+@pytest.mark.parametrize(
+    "found, limit, expected",
+    [
+        (250, None, 250),
+        (250, 100, 100),
+        (250, 101, 101),
+        (250, 200, 200),
+        (250, 199, 199),
+        (250, 1000, 250),
+        (5000, None, 2000),
+        (5000, 2001, 2000),
+        (0, None, 0),
+    ],
+)
+def test_limits_at_page_boundaries(found, limit, expected):
+    ids, client, paginator = collect(found, limit)
+
+    assert ids == list(range(expected))
+    assert paginator.found == found
+    # Only the pages with the needed items are requested
+    assert len(client.requested) == max(1, -(-expected // 100))
+
+
+def test_small_limit_reduces_the_page_size():
+    ids, client, _ = collect(250, limit=5)
+
+    assert ids == [0, 1, 2, 3, 4]
+    assert client.requested == [(0, 5)]
+
+
+def test_page_size_is_at_most_100():
+    ids, client, _ = collect(150, per_page=500)
+
+    assert len(ids) == 150
+    assert {per_page for _, per_page in client.requested} == {100}
+
+
+def test_failed_pages_are_skipped_and_counted():
+    ids, _, paginator = collect(250, fail_pages=[1])
+
+    assert ids == list(range(100)) + list(range(200, 250))
+    assert paginator.skipped_pages == 1
+
+
+def test_failed_first_page_is_raised():
+    with pytest.raises(requests.exceptions.ConnectionError):
+        collect(250, fail_pages=[0])
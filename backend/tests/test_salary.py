@@ -0,0 +1,55 @@
+import numpy as np
+
+from src.salary import SalaryNormalizer
+
+RATES = {"RUR": 1, "USD": 0.01, "EUR": 0.008}
+
+
+def test_salaries_are_converted_to_net_rur():
+    records = [
+        {"salary_from": 100000, "salary_to": 200000, "salary_currency": "RUR", "salary_gross": False},
+        {"salary_from": 1000, "salary_to": None, "salary_currency": "USD", "salary_gross": True},
+        {"salary_from": None, "salary_to": 800, "salary_currency": "EUR", "salary_gross": None},
+    ]
+    SalaryNormalizer(RATES).normalize_records(records)
+
+    assert [(rec["salary_from"], rec["salary_to"]) for rec in records] == [
+        (100000, 200000),
+        (87000, None),
+        (None, 100000),
+    ]
+    assert [rec["salary_currency"] for rec in records] == ["RUR", "RUR", "RUR"]
+    assert [rec["original_currency"] for rec in records] == ["RUR", "USD", "EUR"]
+    assert not any(rec["unknown_currency"] for rec in records)
+    assert all("salary_gross" not in rec for rec in records)
+
+
+def test_unknown_currency_is_flagged_and_not_converted():
+    records = [
+        {"salary_from": 5000, "salary_to": 7000, "salary_currency": "KZT", "salary_gross": False},
+        {"salary_from": None, "salary_to": None, "salary_currency": None, "salary_gross": None},
+    ]
+    SalaryNormalizer(RATES).normalize_records(records)
+
+    assert records[0] == {
+        "salary_from": None,
+        "salary_to": None,
+        "salary_currency": None,
+        "original_currency": "KZT",
+        "unknown_currency": True,
+    }
+    # No salary is not an unknown currency
+    assert records[1]["unknown_currency"] is False
+    assert records[1]["salary_currency"] is None
+
+
+def test_normalize_columns():
+    result = SalaryNormalizer({"USD": 0.01}).normalize([10, None], [20, 30], ["USD", "XXX"], [False, True])
+
+    np.testing.assert_array_equal(result.salary_from, [1000, np.nan])
+    np.testing.assert_array_equal(result.salary_to, [2000, np.nan])
+    np.testing.assert_array_equal(result.unknown_currency, [False, True])
+
+
+def test_empty_records():
+    assert SalaryNormalizer(RATES).normalize_records([]) == []
@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+
+import pytest
+
+from src.singleflight import SingleFlight
+
+
+def run_concurrently(func, threads=10):
+    results, errors = [], []
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(func())
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results, errors
+
+
+@pytest.mark.parametrize("lock_dir", [False, True])
+def test_concurrent_calls_share_one_computation(tmp_path, lock_dir):
+    flight = SingleFlight(str(tmp_path / "locks") if lock_dir else None)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"vacancies": []}
+
+    results, errors = run_concurrently(lambda: flight.do("python|113", compute))
+
+    assert not errors
+    assert len(calls) == 1
+    assert len(results) == 10 and all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+    if lock_dir:
+        assert os.listdir(str(tmp_path / "locks")) == []
+
+
+def test_followers_get_the_error_of_the_leader():
+    flight = SingleFlight()
+
+    def compute():
+        time.sleep(0.2)
+        raise ValueError("hh.ru is not available")
+
+    results, errors = run_concurrently(lambda: flight.do("key", compute), threads=5)
+
+    assert not results
+    assert len(errors) == 5 and all(isinstance(e, ValueError) for e in errors)
+    # The failed call is forgotten: the next call runs again
+    assert flight.do("key", lambda: 1) == 1
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert [flight.do(key, lambda key=key: key.upper()) for key in ("a", "b")] == ["A", "B"]
@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.statistics import NO_EXPERIENCE_LABEL, SalaryStats, VacancyStatistics
+
+
+def salary_stats(values):
+    stats = SalaryStats()
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 100, 1001])
+def test_quantiles_are_exact(size):
+    rng = random.Random(size)
+    values = [rng.choice([50000, 80000, 100000, 120000, 150000, 250000]) + rng.randint(0, 3) for _ in range(size)]
+    stats = salary_stats(values)
+
+    for q in (0, 0.1, 0.25, 0.5, 0.75, 0.9, 1):
+        assert stats.quantile(q) == pytest.approx(np.quantile(values, q))
+    assert stats.median == pytest.approx(np.median(values))
+    assert stats.summary() == {
+        "min": min(values),
+        "max": max(values),
+        "mean": pytest.approx(np.mean(values)),
+        "median": pytest.approx(np.median(values)),
+    }
+
+
+def test_empty_salary_stats():
+    assert SalaryStats().summary() == {"min": 0, "max": 0, "mean": 0, "median": 0}
+    assert SalaryStats().quantile(0.5) == 0
+
+
+def test_merged_stats_equal_stats_of_all_values():
+    rng = random.Random(1)
+    values = [rng.randrange(30000, 300000, 5000) for _ in range(500)]
+    merged = SalaryStats()
+    for start in range(0, len(values), 70):
+        merged.merge(salary_stats(values[start : start + 70]))
+    merged.merge(SalaryStats())
+
+    expected = salary_stats(values)
+    assert merged.count == expected.count
+    assert merged.values == expected.values
+    assert merged.summary() == expected.summary()
+    assert SalaryStats.from_dict(merged.to_dict()).summary() == expected.summary()
+
+
+VACANCIES = [
+    {"salary_from": 100000, "salary_to": 150000, "experience": "Нет опыта", "key_skills": ["Python", " SQL "]},
+    {"salary_from": None, "salary_to": 200000, "experience": None, "key_skills": []},
+    {"salary_from": 0, "salary_to": None, "experience": "Нет опыта", "key_skills": ["Python", "", None]},
+]
+
+
+def test_vacancy_statistics_summary():
+    summary = VacancyStatistics().update(VACANCIES).summary(total=10)
+
+    assert summary["total"] == 10
+    assert summary["salary_stats"] == {"min": 100000, "max": 200000, "mean": 150000, "median": 150000}
+    assert summary["experience_distribution"] == {"Нет опыта": 2, NO_EXPERIENCE_LABEL: 1}
+    assert summary["top_skills"] == {"Python": 2, "SQL": 1}
+    assert summary["skills_stats"] == {"total_vacancies_with_skills": 2}
+
+
+def test_vacancy_statistics_merge_and_round_trip():
+    merged = VacancyStatistics().update(VACANCIES[:1]).merge(VacancyStatistics().update(VACANCIES[1:]))
+    expected = VacancyStatistics().update(VACANCIES).summary()
+
+    assert merged.summary() == expected
+    assert VacancyStatistics.from_dict(merged.to_dict()).summary() == expected
+    assert list(VacancyStatistics(top_k=1).update(VACANCIES).top_skills()) == ["Python"]
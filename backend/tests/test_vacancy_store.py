@@ -0,0 +1,96 @@
+import json
+import os
+
+import pytest
+
+from src.vacancy_store import VacancyTable
+
+RECORDS = [
+    {
+        "id": "1",
+        "name": "Python разработчик",
+        "employer": "Company",
+        "salary_from": 100000,
+        "salary_to": None,
+        "salary_currency": "RUR",
+        "original_currency": "USD",
+        "unknown_currency": False,
+        "experience": "Нет опыта",
+        "schedule": None,
+        "key_skills": ["Python", "SQL"],
+        "description": "Описание",
+    },
+    {
+        "id": "2",
+        "name": "Data Scientist",
+        "employer": "Company",
+        "salary_from": None,
+        "salary_to": None,
+        "salary_currency": None,
+        "original_currency": "KZT",
+        "unknown_currency": True,
+        "experience": "От 1 года до 3 лет",
+        "schedule": "Удаленная работа",
+        "key_skills": [],
+        "description": "",
+    },
+]
+
+
+def expected_records():
+    return [{**record, "has_salary": record["salary_from"] is not None} for record in RECORDS]
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_table_round_trip(tmp_path, mmap):
+    path = str(tmp_path / "table")
+    assert not VacancyTable.exists(path)
+    VacancyTable.from_records(RECORDS).save(path)
+    assert VacancyTable.exists(path)
+    table = VacancyTable.load(path, mmap=mmap)
+
+    assert len(table) == 2
+    assert table.ids() == ["1", "2"]
+    assert list(table.to_records()) == expected_records()
+    assert table.lists("key_skills") == [["Python", "SQL"], []]
+
+
+def test_save_replaces_table(tmp_path):
+    path = str(tmp_path / "table")
+    VacancyTable.from_records(RECORDS).save(path)
+    VacancyTable.from_records(RECORDS[1:]).save(path)
+
+    assert VacancyTable.load(path).ids() == ["2"]
+    assert os.listdir(str(tmp_path)) == ["table"]
+
+
+def test_dataframe(tmp_path):
+    pytest.importorskip("pandas")
+    df = VacancyTable.from_records(RECORDS).to_dataframe()
+
+    assert list(df.index) == ["1", "2"]
+    assert df.loc["1", "key_skills"] == ["Python", "SQL"]
+    assert df["employer"].dtype == "category"
+    assert df["salary_from"].isna().tolist() == [False, True]
+
+
+def test_empty_table(tmp_path):
+    path = str(tmp_path / "table")
+    VacancyTable.from_records([]).save(path)
+    table = VacancyTable.load(path)
+
+    assert len(table) == 0
+    assert list(table.to_records()) == []
+
+
+def test_unsupported_version_is_rejected(tmp_path):
+    path = str(tmp_path / "table")
+    VacancyTable.from_records(RECORDS).save(path)
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({**meta, "version": 0}, f)
+
+    assert not VacancyTable.exists(path)
+    with pytest.raises(ValueError):
+        VacancyTable.load(path)